@@ -2,7 +2,7 @@
 cpdflow is a declarative approach to model lifecycle management on Cloud Pak for Data.
 """
 
-from cpdflow.config import init_config
+from cpdflow.config import flatten_config, init_config
 from cpdflow.lifecycle import apply, delete
 from cpdflow.utils.logging_utils import _configure_loggers
 from cpdflow.version import __version__
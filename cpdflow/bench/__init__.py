@@ -0,0 +1,5 @@
+"""
+Load test deployments.
+"""
+
+from .bench import get_url_score, run_benchmark, score
@@ -0,0 +1,152 @@
+"""
+Load test deployments.
+"""
+import itertools
+import logging
+import threading
+import time
+
+import requests
+
+from cpdflow.utils import stats_utils
+from cpdflow.wml import wml
+
+_logger = logging.getLogger(__name__)
+
+
+def run_benchmark(score: callable, scoring_payloads: list, duration: float, concurrency: int, rate: float = None) -> dict:
+    """
+    Run benchmark by calling ``score`` with scoring payloads for the given duration.
+
+    Requests are sent by ``concurrency`` workers. If ``rate`` is set, requests are scheduled at the target rate
+    in requests per second, otherwise each worker sends the next request as soon as the previous one completes.
+
+    Args:
+        score (callable): function that scores a scoring payload
+        scoring_payloads (list[dict]): scoring payloads, sent in turn
+        duration (float): duration in seconds
+        concurrency (int): number of workers
+        rate (float): target rate in requests per second
+
+    Returns:
+        dict: benchmark results, with the throughput of all requests and of successful and failed requests
+    """
+    lock = threading.Lock()
+    counter = itertools.count()
+    latencies = []
+    errors = []
+    rows = []
+    start = time.perf_counter()
+    end = start + duration
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter)
+            scheduled = start + i / rate if rate else time.perf_counter()
+            if scheduled >= end:
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            scoring_payload = scoring_payloads[i % len(scoring_payloads)]
+            request_start = time.perf_counter()
+            try:
+                score(scoring_payload)
+            except Exception as ex:
+                with lock:
+                    errors.append(str(ex))
+                continue
+            latency = time.perf_counter() - request_start
+            with lock:
+                latencies.append(latency * 1000)
+                rows.append(len(scoring_payload["input_data"][0]["values"]))
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for x in workers:
+        x.start()
+    for x in workers:
+        x.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "duration": round(elapsed, 3),
+        "concurrency": concurrency,
+        "rate": rate,
+        "requests": len(latencies) + len(errors),
+        "successes": len(latencies),
+        "errors": len(errors),
+        "error_messages": sorted(set(errors))[:10],
+        "rows": sum(rows),
+        "requests_per_second": round((len(latencies) + len(errors)) / elapsed, 3),
+        "successes_per_second": round(len(latencies) / elapsed, 3),
+        "errors_per_second": round(len(errors) / elapsed, 3),
+        "rows_per_second": round(sum(rows) / elapsed, 3),
+        "latency_ms": {k: round(v, 3) if v is not None else None for k, v in stats_utils.get_percentiles(latencies).items()},
+    }
+
+
+def get_url_score(url: str, session: requests.Session) -> callable:
+    """
+    Get function that scores a scoring payload with a HTTP endpoint.
+
+    Args:
+        url (str): scoring url
+        session (requests.Session): http session
+
+    Returns:
+        callable: function that scores a scoring payload
+    """
+
+    def score(scoring_payload):
+        response = session.post(url, json=scoring_payload, headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        return response.json()
+
+    return score
+
+
+def score(config: dict, model_name: str, scoring_payload: dict, space_type: str, duration: float, concurrency: int, rate: float = None, batch_size: int = None, url: str = None) -> dict:
+    """
+    Load test model deployment with the scoring payload.
+
+    The deployment is looked up by model name in the given space unless ``url`` is set,
+    in which case the scoring payload is sent to ``url``, e.g. a local HTTP stand-in.
+    Exactly one of ``model_name`` and ``url`` must be given.
+
+    Args:
+        config (dict): configuration dictionary
+        model_name (str): model name
+        scoring_payload (dict): scoring payload
+        space_type (str): development or production environment
+        duration (float): duration in seconds
+        concurrency (int): number of workers
+        rate (float): target rate in requests per second
+        batch_size (int): number of rows in each request, defaults to all rows
+        url (str): scoring url
+
+    Returns:
+        dict: benchmark results
+    """
+    log_format = f"BENCH - {'SCORE':<15}"
+    if bool(model_name) == bool(url):
+        raise ValueError("Exactly one of model_name and url must be given.")
+    if url:
+        target = url
+        score_payload = get_url_score(url=url, session=requests.Session())
+    else:
+        deployment_name = wml.get_model_deployment_name(model_name=model_name)
+        deployment_uid = wml.get_deployments(config=config, space_type=space_type)[deployment_name]
+        target = deployment_name
+        score_payload = wml.get_deployment_score(config=config, deployment_uid=deployment_uid)
+
+    if batch_size:
+        scoring_payloads = wml.get_scoring_payload_batches(scoring_payload=scoring_payload, batch_size=batch_size)
+    else:
+        scoring_payloads = [scoring_payload]
+
+    _logger.info(f"{log_format} - running ... {target} for {duration}s with concurrency {concurrency}.")
+    results = run_benchmark(score=score_payload, scoring_payloads=scoring_payloads, duration=duration, concurrency=concurrency, rate=rate)
+    results = {"model_name": model_name, "target": target, "space_type": space_type, "batch_size": batch_size, **results}
+    _logger.info(f"{log_format} - completed {results['requests']} requests with {results['errors']} errors, {results['rows_per_second']} rows/s, {results['latency_ms']}.")
+    return results
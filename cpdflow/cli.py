@@ -6,6 +6,11 @@ import json
 import click
 import logging
 import cpdflow
+import cpdflow.bench
+from cpdflow.metrics import harness
+from cpdflow.model import model as model_
+from cpdflow.utils import payload_utils
+from cpdflow.wos import wos
 
 _logger = logging.getLogger(__name__)
 
@@ -69,7 +74,7 @@ def apply_develop(config, model):
 
 @click.option("--config", "-c", type=str, default="config.json", help="path to configuration file")
 @click.option("--model", "-m", type=str, multiple=True, help="name of model")
-@click.option("--space", "-s", type=str, help="deployment space")
+@click.option("--space", "-s", type=str, multiple=True, default=("dev",), help="deployment space, can be repeated, defaults to dev")
 @delete.command("deploy")
 def delete_deploy(config, model, space):
     """
@@ -78,12 +83,12 @@ def delete_deploy(config, model, space):
     with open(config) as f:
         config = json.load(f)
     config = cpdflow.init_config(config=config)
-    cpdflow.delete.deploy(config=config, model_names=list(model), space_type=space)
+    cpdflow.delete.deploy(config=config, model_names=list(model), space_type=list(space))
 
 
 @click.option("--config", "-c", type=str, default="config.json", help="path to configuration file")
 @click.option("--model", "-m", type=str, multiple=True, help="name of model")
-@click.option("--space", "-s", type=str, help="deployment space")
+@click.option("--space", "-s", type=str, multiple=True, default=("dev",), help="deployment space, can be repeated, defaults to dev")
 @apply.command("deploy")
 def apply_deploy(config, model, space):
     """
@@ -92,7 +97,7 @@ def apply_deploy(config, model, space):
     with open(config) as f:
         config = json.load(f)
     config = cpdflow.init_config(config=config)
-    cpdflow.apply.deploy(config=config, model_names=list(model), space_type=space)
+    cpdflow.apply.deploy(config=config, model_names=list(model), space_type=list(space))
 
 
 @click.option("--config", "-c", type=str, default="config.json", help="path to configuration file")
@@ -132,5 +137,85 @@ def operate(config, model):
     """
     cpdflow.apply.operate(config=config, model_names=list(model))
 
+@cli.group()
+def bench():
+    """
+    Load test deployments.
+    """
+    pass
+
+
+@click.option("--config", "-c", type=str, default="config.json", help="path to configuration file")
+@click.option("--model", "-m", type=str, help="name of model, unless --url is given")
+@click.option("--space", "-s", type=str, default="dev", help="deployment space")
+@click.option("--duration", "-d", type=float, default=30, help="duration in seconds")
+@click.option("--concurrency", type=int, default=1, help="number of concurrent requests")
+@click.option("--rate", type=float, help="target rate in requests per second")
+@click.option("--batch-size", type=int, help="number of rows in each request")
+@click.option("--url", type=str, help="scoring url, e.g. a local HTTP stand-in")
+@click.option("--output", "-o", type=str, help="path to save results in json")
+@bench.command("score")
+def bench_score(config, model, space, duration, concurrency, rate, batch_size, url, output):
+    """
+    Load test model deployment with the scoring payload.
+    """
+    if bool(model) == bool(url):
+        raise click.UsageError("Exactly one of --model and --url must be given.")
+    with open(config) as f:
+        config = json.load(f)
+    config = cpdflow.flatten_config(config=config) if url else cpdflow.init_config(config=config)
+    scoring_payload = payload_utils.get_scoring_payload(config=config)
+    results = cpdflow.bench.score(
+        config=config, model_name=model, scoring_payload=scoring_payload, space_type=space, duration=duration, concurrency=concurrency, rate=rate, batch_size=batch_size, url=url
+    )
+    click.echo(json.dumps(results, indent=4))
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+@cli.group()
+def metrics():
+    """
+    Run custom metric scripts locally.
+    """
+    pass
+
+
+@click.option("--config", "-c", type=str, default="config.json", help="path to configuration file")
+@click.option("--file", "-f", "file_name", type=str, help="path to feedback csv or parquet file, defaults to the feedback payload")
+@click.option("--script", type=str, help="path to custom metric script, defaults to custom_metric_script")
+@click.option("--model", "-m", type=str, help="name of model to add predictions to the feedback records")
+@click.option("--output", "-o", type=str, help="path to save results in json")
+@metrics.command("run")
+def metrics_run(config, file_name, script, model, output):
+    """
+    Run custom metric script on feedback records and validate the metrics against the custom monitor.
+    """
+    with open(config) as f:
+        config = json.load(f)
+    config = cpdflow.flatten_config(config=config)
+    df = harness.read_feedback(file_name=file_name or config["feedback_payload"]["file_name"])
+    if model:
+        model_config = [x for x in config["model_configs"] if x["model_name"] == model][0]
+        model_.run_model(config=config, model_config=model_config, log_format=f"METRICS - {'RUN':<15} - run_model")
+        fields = [x["name"] for x in model_config["input_data_schema"][0]["fields"]]
+        df["_original_prediction"] = model_config["model"].predict(df[fields])
+    metric_definitions, tags = wos.get_custom_metric_definitions(config=config)
+    results = harness.run(
+        custom_metric_script=script or config["custom_metric"]["custom_metric_script"],
+        df=df,
+        metric_definitions=metric_definitions,
+        tags=tags,
+        page_size=config["custom_metric"].get("page_size", 1000),
+    )
+    click.echo(json.dumps(results, indent=4, default=str))
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4, default=str)
+    if results["errors"]:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     cli()
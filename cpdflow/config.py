@@ -17,6 +17,23 @@ from cpdflow.wkc import wkc
 _logger = logging.getLogger(__name__)
 
 
+def flatten_config(config: dict) -> dict:
+    """
+    Flatten the sections of the configuration into a single dictionary.
+
+    Args:
+        config (dict): configuration dictionary with sections, e.g. platform, ws, wml
+
+    Returns:
+        dict: a flattened configuration dictionary
+    """
+    config_ = config.values()
+    config = {}
+    for x in config_:
+        config.update(x)
+    return config
+
+
 def init_config(config: dict) -> dict:
     """
     Initialize configuration and return configuration dictionary.
@@ -31,11 +48,8 @@ def init_config(config: dict) -> dict:
     """
     _logger.info("CONFIG - START")
 
-    config_ = config.values()
-    config = {}
-    for x in config_:
-        config.update(x)
-    
+    config = flatten_config(config=config)
+
     wml_credentials = {"apikey": config["apikey"], "url": config["url"]}
     wml_client = ibm_watson_machine_learning.APIClient(wml_credentials)
     wos_client = ibm_watson_openscale.APIClient(authenticator=ibm_cloud_sdk_core.authenticators.IAMAuthenticator(apikey=config["apikey"]))
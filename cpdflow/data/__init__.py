@@ -0,0 +1,5 @@
+"""
+Read datasets through a shared local cache.
+"""
+
+from .data import get_url_fingerprint, read_csv
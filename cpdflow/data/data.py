@@ -0,0 +1,140 @@
+"""
+Read datasets through a shared local cache.
+"""
+import json
+import logging
+import os
+import shutil
+
+import pandas as pd
+import pyarrow
+import pyarrow.parquet
+import requests
+
+from cpdflow.utils import cache_utils
+
+_logger = logging.getLogger(__name__)
+
+_tables = {}
+
+
+def get_cache_file_names(cache_key: str, cache_dir: str = None) -> tuple:
+    """
+    Get paths to the cached parquet file and its validators.
+
+    Args:
+        cache_key (str): cache key of the dataset
+        cache_dir (str): cache directory, defaults to ``.cpdflow``
+
+    Returns:
+        tuple: path to parquet file and path to json file with the ETag and Last-Modified headers
+    """
+    config = {"cache_dir": cache_dir} if cache_dir else {}
+    data_dir = cache_utils.get_cache_dir(config=config, name="data")
+    return os.path.join(data_dir, cache_key + ".parquet"), os.path.join(data_dir, cache_key + ".json")
+
+
+def fetch_csv(url: str, parquet_file_name: str, validators_file_name: str, **kwargs) -> bool:
+    """
+    Fetch csv file with a conditional request and convert it to parquet.
+
+    The request is sent with the ``If-None-Match`` and ``If-Modified-Since`` headers from the previous response,
+    so that the file is only downloaded and converted again when it changes.
+
+    Args:
+        url (str): dataset url
+        parquet_file_name (str): path to parquet file
+        validators_file_name (str): path to json file with the ETag and Last-Modified headers
+        kwargs: keyword arguments for ``pd.read_csv``
+
+    Returns:
+        bool: True if the file was downloaded
+    """
+    validators = {}
+    if os.path.exists(parquet_file_name) and os.path.exists(validators_file_name):
+        with open(validators_file_name) as f:
+            validators = json.load(f)
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        tmp_file_name = f"{parquet_file_name}.{os.getpid()}.tmp"
+        with open(tmp_file_name + ".csv", "wb") as f:
+            response.raw.decode_content = True
+            shutil.copyfileobj(response.raw, f)
+        try:
+            df = pd.read_csv(tmp_file_name + ".csv", **kwargs)
+        finally:
+            os.remove(tmp_file_name + ".csv")
+        df.to_parquet(tmp_file_name, index=False)
+        os.replace(tmp_file_name, parquet_file_name)
+        validators = {"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    with open(f"{validators_file_name}.{os.getpid()}.tmp", "w") as f:
+        json.dump(validators, f, indent=4)
+    os.replace(f"{validators_file_name}.{os.getpid()}.tmp", validators_file_name)
+    return True
+
+
+def get_url_fingerprint(url: str) -> dict:
+    """
+    Get fingerprint of a dataset url from the ``ETag`` and ``Last-Modified`` headers of a ``HEAD`` request.
+
+    Args:
+        url (str): dataset url
+
+    Returns:
+        dict: a dictionary of url, ETag and Last-Modified
+    """
+    response = requests.head(url, allow_redirects=True, timeout=60)
+    response.raise_for_status()
+    return {"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+
+def read_csv(url: str, cache_dir: str = None, **kwargs) -> pd.DataFrame:
+    """
+    Read csv dataset from a url or a local file through a shared local cache.
+
+    The first read in a process revalidates the cached copy with the ``ETag`` or ``Last-Modified`` headers and
+    only downloads the file when it changes. The csv file is parsed once and cached in parquet format,
+    which is memory-mapped on load and shared by every model script in the process. Local files are cached by
+    the file path, modified time and size. If the url cannot be reached, the cached copy is used.
+
+    Args:
+        url (str): dataset url or path to csv file
+        cache_dir (str): cache directory, defaults to ``.cpdflow``
+        kwargs: keyword arguments for ``pd.read_csv``
+
+    Returns:
+        pd.DataFrame: dataset
+    """
+    if url.startswith("http://") or url.startswith("https://"):
+        cache_key = cache_utils.get_hash({"url": url, **kwargs})
+    else:
+        cache_key = cache_utils.get_hash({**cache_utils.get_file_fingerprint(file_name=url), **kwargs})
+    if cache_key in _tables:
+        return _tables[cache_key].to_pandas()
+
+    parquet_file_name, validators_file_name = get_cache_file_names(cache_key=cache_key, cache_dir=cache_dir)
+    if url.startswith("http://") or url.startswith("https://"):
+        try:
+            if fetch_csv(url=url, parquet_file_name=parquet_file_name, validators_file_name=validators_file_name, **kwargs):
+                _logger.info(f"DATA - downloaded ... {url}.")
+        except requests.exceptions.RequestException as ex:
+            if not os.path.exists(parquet_file_name):
+                raise
+            _logger.warning(f"DATA - unable to revalidate, using cached copy ... {url}: {ex}")
+    elif not os.path.exists(parquet_file_name):
+        _logger.info(f"DATA - parsing ... {url}.")
+        tmp_file_name = f"{parquet_file_name}.{os.getpid()}.tmp"
+        pd.read_csv(url, **kwargs).to_parquet(tmp_file_name, index=False)
+        os.replace(tmp_file_name, parquet_file_name)
+
+    _tables[cache_key] = pyarrow.parquet.read_table(parquet_file_name, memory_map=True)
+    return _tables[cache_key].to_pandas()
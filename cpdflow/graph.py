@@ -24,7 +24,7 @@ graph_operation = {
         "require": [wml.check_model_stored]
     },
     "get_metadata": {
-        "forward": [model.run_model], 
+        "forward": [model.get_metadata], 
         "backward": None, 
         "require": [return_false]
     },
@@ -44,7 +44,7 @@ graph_operation = {
         "require": [wml.check_model_stored]
     },
     "promote_model": {
-        "forward": [wml.promote_model], 
+        "forward": [wml.promote_model_to_spaces], 
         "backward": [wkc.delete_model_from_inventory_by_model_names, wml.delete_model_by_model_names], 
         "require": [wml.check_model_promoted]
     },
@@ -204,6 +204,9 @@ def run(direction: str, steps: list, args: dict) -> None:
     """
     Run steps.
 
+    Functions that take ``space_type`` are run once for each space, other functions, e.g. those that take ``space_types`` or run in project space,
+    are run once for all spaces.
+
     Args:
         direction (str): forward, backward or require
         steps (list[str]): steps to be run
@@ -215,11 +218,15 @@ def run(direction: str, steps: list, args: dict) -> None:
     for step in steps:
         if G.nodes[step][direction]:
             for x in G.nodes[step][direction]:
+                f_code = x.__code__
+                required_args = f_code.co_varnames[: f_code.co_argcount + f_code.co_kwonlyargcount]
+                if "space_type" not in required_args:
+                    _logger.info(f"{log_format} - running ... {x.__name__} for {space_types}.")
+                    results[step] = x(**{k: v for k, v in args.items() if k in required_args})
+                    continue
                 for space_type in space_types:
                     _logger.info(f"{log_format} - running ... {x.__name__} in {space_type}.")
                     args["space_type"] = space_type
-                    f_code = x.__code__
-                    required_args = f_code.co_varnames[: f_code.co_argcount + f_code.co_kwonlyargcount]
                     results[step] = x(**{k: v for k, v in args.items() if k in required_args})
     return results
 
@@ -23,7 +23,7 @@ class apply:
         develop.apply(config=config, model_names=model_names)
 
     @staticmethod
-    def deploy(config: dict, model_names: list, space_type: str) -> None:
+    def deploy(config: dict, model_names: list, space_type: "str | list") -> None:
         deploy.apply(config=config, model_names=model_names, space_type=space_type)
 
     @staticmethod
@@ -45,7 +45,7 @@ class delete:
         develop.delete(config=config, model_names=model_names)
 
     @staticmethod
-    def deploy(config: dict, model_names: list, space_type: str) -> None:
+    def deploy(config: dict, model_names: list, space_type: "str | list") -> None:
         deploy.delete(config=config, model_names=model_names, space_type=space_type)
 
     @staticmethod
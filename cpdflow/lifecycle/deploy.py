@@ -4,6 +4,8 @@ Promotes and deploys model to the specified environment.
 import logging
 import importlib
 from cpdflow import graph
+from cpdflow.model import model
+from cpdflow.wkc import wkc
 from cpdflow.wml import wml
 from cpdflow.wos import wos
 
@@ -56,6 +58,8 @@ def deploy_overwrite(config: dict, model_configs: list, space_type: str, backwar
     """
     Overwrite deployments that are specified in ``model_configs``.
 
+    Models with the same fingerprint as the model in project space are not overwritten.
+
     Args:
         config (dict): configuration dictionary
         model_configs (list[dict]): models to be removed
@@ -63,7 +67,14 @@ def deploy_overwrite(config: dict, model_configs: list, space_type: str, backwar
         backward_steps (list[str]): list of steps to remove downstream assets
     """
     if model_configs:
-        model_names = [x["model_name"] for x in model_configs if x["overwrite"]]
+        fingerprints = wml.get_model_fingerprints(config=config, space_type="project")
+        space_fingerprints = wml.get_model_fingerprints(config=config, space_type=space_type)
+        model_names = []
+        for model_name in [x["model_name"] for x in model_configs if x["overwrite"]]:
+            if fingerprints.get(model_name) and fingerprints.get(model_name) == space_fingerprints.get(model_name):
+                _logger.info(f"DEPLOY - {'OVERWRITE':<15} - {model_name} is unchanged in {space_type}.")
+            else:
+                model_names.append(model_name)
         if model_names:
             log_format = f"DEPLOY - {'OVERWRITE':<15} - backward_steps"
             _logger.info(f"{log_format} - {' -> '.join(backward_steps)} for {model_names}")
@@ -74,19 +85,24 @@ def deploy_overwrite(config: dict, model_configs: list, space_type: str, backwar
         _logger.info(f"DEPLOY - {'OVERWRITE':<15} - Nothing to overwrite")
 
 
-def deploy_create(config: dict, model_configs: list, space_type: str, check_require_steps: list, forward_steps: list) -> None:
+def deploy_create(config: dict, model_configs: list, space_types: list, check_require_steps: list, forward_steps: list) -> None:
     """
     Create deployments that are specified in ``model_configs``.
 
+    Each model is promoted to all spaces where it is not deployed in a single step, and then deployed in each of these spaces.
+
     Args:
         config (dict): configuration dictionary
         model_configs (list[dict]): models to be removed
-        space_type (str): development or production environment
+        space_types (list[str]): development or production environments
         check_require_steps (list[str]): list of steps to create upstream assets
         forward_steps (list[str]): list of steps to create downstream assets
     """
-    all_deployments = wml.get_deployments(config=config, space_type=space_type)
-    model_configs = [x for x in model_configs if wml.get_model_deployment_name(model_name=x["model_name"]) not in all_deployments.keys()]
+    all_deployments = {x: wml.get_deployments(config=config, space_type=x) for x in space_types}
+    create_space_types = {
+        x["model_name"]: [y for y in space_types if wml.get_model_deployment_name(model_name=x["model_name"]) not in all_deployments[y]] for x in model_configs
+    }
+    model_configs = [x for x in model_configs if create_space_types[x["model_name"]]]
     if model_configs:
         for model_config in model_configs:
             model_name = model_config["model_name"]
@@ -94,7 +110,7 @@ def deploy_create(config: dict, model_configs: list, space_type: str, check_requ
                 "config": config,
                 "model_config": model_config,
                 "model_name": model_name,
-                "space_types": [space_type],
+                "space_types": create_space_types[model_name],
             }
             log_format = f"DEPLOY - {'REQUIREMENTS':<15} - require_steps"
             args["log_format"] = log_format
@@ -102,11 +118,11 @@ def deploy_create(config: dict, model_configs: list, space_type: str, check_requ
             results = graph.run(direction="require", steps=check_require_steps, args=args)
 
             require_steps = [k for k, v in results.items() if not v]
-            forward_steps = require_steps + forward_steps
+            steps = require_steps + forward_steps
             log_format = f"DEPLOY - {'CREATE':<15} - forward_steps"
             args["log_format"] = log_format
-            _logger.info(f"{log_format} - {' -> '.join(forward_steps)} for {model_name}.")
-            graph.run(direction="forward", steps=forward_steps, args=args)
+            _logger.info(f"{log_format} - {' -> '.join(steps)} for {model_name} in {create_space_types[model_name]}.")
+            graph.run(direction="forward", steps=steps, args=args)
     else:
         _logger.info(f"DEPLOY - {'CREATE':<15} - Nothing to create")
 
@@ -117,52 +133,63 @@ class deploy:
     """
 
     @staticmethod
-    def delete(config: dict, model_names: list, space_type: str) -> None:
+    def delete(config: dict, model_names: list, space_type: "str | list") -> None:
         """
         Removes model deployments specified in ``model_configs``.
 
         Args:
             config (dict): configuration dictionary
             model_names (list[str]): models to be removed, updated, overwritten or created
+            space_type (str | list[str]): development or production environment, or a list of environments
         """
         model_names_copy = model_names[:]
         _logger.info(f"DEPLOY - {'START':<15} - {model_names}.")
+        wkc.clear_model_entry_index(config=config)
 
+        space_types = space_type if isinstance(space_type, (list, tuple)) else [space_type]
         backward_steps = graph.get_backward_steps(source="promote_model", target="subscribe_model")
         model_configs = [x for x in config["model_configs"] if x["model_name"] in model_names]
 
         # remove
-        deploy_remove(config=config, model_configs=model_configs, space_type=space_type, backward_steps=backward_steps)
+        for space_type in space_types:
+            deploy_remove(config=config, model_configs=model_configs, space_type=space_type, backward_steps=backward_steps)
 
         _logger.info(f"DEPLOY - {'COMPLETED':<15} - {model_names_copy}.")
 
     @staticmethod
-    def apply(config: dict, model_names: list, space_type: str) -> None:
+    def apply(config: dict, model_names: list, space_type: "str | list") -> None:
         """
         Create model deployments specified in ``model_configs``.
 
+        Models are promoted to several spaces at once if ``space_type`` is a list, e.g. ``["dev", "prod"]``.
+
         Args:
             config (dict): configuration dictionary
             model_names (list[str]): deployments to be removed, updated, overwritten or created
-            space_type (str): development or production environment
+            space_type (str | list[str]): development or production environment, or a list of environments
         """
         model_names_copy = model_names[:]
         _logger.info(f"DEPLOY - {'START':<15} - {model_names}")
+        wkc.clear_model_entry_index(config=config)
+        model.clear_model_cache_keys(model_configs=config["model_configs"])
 
         forward_steps = graph.get_forward_steps(source="promote_model", target="deploy_model")
         backward_steps = graph.get_backward_steps(source="promote_model", target="subscribe_model")
         check_require_steps = graph.get_check_require_steps(source="run_model", target="promote_model")
 
+        space_types = space_type if isinstance(space_type, (list, tuple)) else [space_type]
         model_configs = [x for x in config["model_configs"] if x["model_name"] in model_names]
 
         # update
-        deploy_update(config=config, model_configs=model_configs, space_type=space_type)
+        for space_type in space_types:
+            deploy_update(config=config, model_configs=model_configs, space_type=space_type)
 
         # overwrite
-        deploy_overwrite(config=config, model_configs=model_configs, space_type=space_type, backward_steps=backward_steps)
+        for space_type in space_types:
+            deploy_overwrite(config=config, model_configs=model_configs, space_type=space_type, backward_steps=backward_steps)
 
         # create
-        deploy_create(config=config, model_configs=model_configs, space_type=space_type, check_require_steps=check_require_steps, forward_steps=forward_steps)
+        deploy_create(config=config, model_configs=model_configs, space_types=space_types, check_require_steps=check_require_steps, forward_steps=forward_steps)
 
         _logger.info(f"DEPLOY - {'COMPLETED':<15} - {model_names_copy}")
 
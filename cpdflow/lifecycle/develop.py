@@ -3,6 +3,8 @@ Runs and stores model in project space with Factsheets.
 """
 import logging
 from cpdflow import graph
+from cpdflow.model import model
+from cpdflow.wkc import wkc
 from cpdflow.wml import wml
 from cpdflow.ws import ws
 
@@ -42,13 +44,18 @@ def develop_update(config: dict, model_configs: list, update_steps: list) -> Non
     all_models = wml.get_models(config=config, space_type="project")
     model_configs = [x for x in model_configs if x["update"] and x["model_name"] in all_models]
     if model_configs:
+        model.train_models(config=config, model_configs=model_configs, log_format=f"DEVELOP - {'UPDATE':<15} - train_models")
         for model_config in model_configs:
             model_name = model_config["model_name"]
             log_format = f"DEVELOP - {'UPDATE':<15} - update_steps"
             _logger.info(f"{log_format} - {' -> '.join(update_steps)} for {model_name}.")
             args = {"config": config, "model_config": model_config, "space_types": ["project"], "log_format": log_format}
-            graph.run(direction="forward", steps=update_steps, args=args)
-            ws.update_model(config=config, model_config=model_config, log_format=log_format)
+            try:
+                graph.run(direction="forward", steps=update_steps, args=args)
+                ws.update_model(config=config, model_config=model_config, log_format=log_format)
+            finally:
+                # facts are exported in the background and are not waited for if a step fails before the model is updated
+                wkc.wait_for_facts(model_config=model_config, log_format=log_format)
     else:
         _logger.info(f"DEVELOP - {'UPDATE':<15} - Nothing to update.")
 
@@ -57,6 +64,9 @@ def develop_overwrite(config: dict, model_configs: list, space_types: list, back
     """
     Overwrite models that are specified in ``model_configs``.
 
+    Models are not overwritten if the models promoted to ``space_types`` have the same fingerprint as the model in project space,
+    which is the fingerprint of the updated model if it has been updated by ``develop_update``.
+
     Args:
         config (dict): configuration dictionary
         model_configs (list[dict]): models to be removed
@@ -65,7 +75,17 @@ def develop_overwrite(config: dict, model_configs: list, space_types: list, back
     """
     all_models = wml.get_models(config=config, space_type="project")
     if model_configs:
-        model_names = [x["model_name"] for x in model_configs if x["overwrite"] and x["model_name"] in all_models]
+        model_configs = [x for x in model_configs if x["overwrite"] and x["model_name"] in all_models]
+        fingerprints = wml.get_model_fingerprints(config=config, space_type="project") if model_configs else {}
+        space_fingerprints = [wml.get_model_fingerprints(config=config, space_type=x) for x in space_types] if model_configs else []
+        model_names = []
+        for model_config in model_configs:
+            model_name = model_config["model_name"]
+            fingerprint = model_config.get("fingerprint", fingerprints.get(model_name))
+            if fingerprint and all(x.get(model_name, fingerprint) == fingerprint for x in space_fingerprints):
+                _logger.info(f"DEVELOP - {'OVERWRITE':<15} - get_fingerprint - {model_name} is unchanged.")
+            else:
+                model_names.append(model_name)
         if model_names:
             log_format = f"DEVELOP - {'OVERWRITE':<15} - backward_steps"
             _logger.info(f"{log_format} - {' -> '.join(backward_steps)} for {model_names}.")
@@ -88,12 +108,17 @@ def develop_create(config: dict, model_configs: list, forward_steps: list) -> No
     all_models = wml.get_models(config=config, space_type="project")
     model_configs = [x for x in model_configs if x["model_name"] not in all_models.keys()]
     if model_configs:
+        model.train_models(config=config, model_configs=model_configs, log_format=f"DEVELOP - {'CREATE':<15} - train_models")
         for model_config in model_configs:
             model_name = model_config["model_name"]
             log_format = f"DEVELOP - {'CREATE':<15} - forward_steps"
             _logger.info(f"{log_format} - {' -> '.join(forward_steps)} for {model_name}.")
             args = {"config": config, "model_config": model_config, "space_types": ["project"], "log_format": log_format}
-            graph.run(direction="forward", steps=forward_steps, args=args)
+            try:
+                graph.run(direction="forward", steps=forward_steps, args=args)
+            finally:
+                # facts are exported in the background and are not waited for if a step fails before the model is stored
+                wkc.wait_for_facts(model_config=model_config, log_format=log_format)
     else:
         _logger.info(f"DEVELOP - {'CREATE':<15} - Nothing to create.")
 
@@ -114,6 +139,7 @@ class develop:
         """
         model_names_copy = model_names[:]
         _logger.info(f"DEVELOP - {'START':<15} - {model_names}.")
+        wkc.clear_model_entry_index(config=config)
 
         backward_steps = graph.get_backward_steps(source="run_model", target="subscribe_model")
         model_configs = [x for x in config["model_configs"] if x["model_name"] in model_names]
@@ -134,6 +160,8 @@ class develop:
         """
         model_names_copy = model_names[:]
         _logger.info(f"DEVELOP - {'START':<15} - {model_names}.")
+        wkc.clear_model_entry_index(config=config)
+        model.clear_model_cache_keys(model_configs=config["model_configs"])
 
         forward_steps = graph.get_forward_steps(source="run_model", target="register_model")
         backward_steps = graph.get_backward_steps(source="run_model", target="subscribe_model")
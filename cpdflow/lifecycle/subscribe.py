@@ -2,10 +2,11 @@
 Subscribe and evaluate model on OpenScale in development or production.
 """
 import logging
-import pandas as pd
 from cpdflow import graph
+from cpdflow.model import model
 from cpdflow.wos import wos
 from cpdflow.wml import wml
+from cpdflow.utils import payload_utils
 import functools
 
 _logger = logging.getLogger(__name__)
@@ -134,14 +135,12 @@ def subscribe(config: dict, model_names: list, space_type: str) -> None:
     """
     model_names_copy = model_names[:]
     _logger.info(f"SUBSCRIBE - {'START':<15} - {model_names}")
+    model.clear_model_cache_keys(model_configs=config["model_configs"])
 
     backward_steps = graph.get_backward_steps(source="subscribe_model", target="evaluate")
 
-    df_scoring_payload = pd.read_csv(config["scoring_payload"]["file_name"])
-    df_meta_payload = pd.read_csv(config["meta_payload"]["file_name"])
-    meta_payload = {"fields": df_meta_payload.columns.tolist(), "values": df_meta_payload.values.tolist()}
-    scoring_payload = {"input_data": [{"fields": df_scoring_payload.columns.tolist(), "values": df_scoring_payload.values.tolist(), "meta": meta_payload}]}
-    feedback_payload = pd.read_csv(config["feedback_payload"]["file_name"])
+    scoring_payload = payload_utils.get_scoring_payload(config=config)
+    feedback_payload = payload_utils.read_payload(config=config, payload_config=config["feedback_payload"])
 
     model_configs = [x for x in config["model_configs"] if x["model_name"] in model_names]
     model_names = [x["model_name"] for x in model_configs]
@@ -154,7 +153,7 @@ def subscribe(config: dict, model_names: list, space_type: str) -> None:
 
     # custom metric
     if "custom_metric" in config:
-        if "overwrite" in config["custom_metric"]:
+        if config["custom_metric"].get("overwrite"):
             custom_metric_overwrite(config=config, space_type=space_type)
         wos.create_custom_metric_provider(config=config, space_type=space_type)
         wos.create_integrated_system(config=config, space_type=space_type)
@@ -0,0 +1,13 @@
+"""
+Group fairness metrics.
+"""
+
+from .metrics import (
+    get_group_counts,
+    merge_group_counts,
+    statistical_parity_difference,
+    disparate_impact_ratio,
+    equal_opportunity_difference,
+    average_odds_difference,
+    get_fairness_metrics,
+)
@@ -0,0 +1,168 @@
+"""
+Run custom metric scripts locally.
+"""
+import logging
+import math
+import sys
+import time
+import tracemalloc
+import types
+
+import pandas as pd
+
+from cpdflow.metrics import metrics as metrics_
+
+_logger = logging.getLogger(__name__)
+
+
+def load_custom_metric_script(custom_metric_script: str) -> types.ModuleType:
+    """
+    Load custom metric script in the same way as the custom metrics provider function, with ``cpdflow.metrics`` available as ``cpdflow_metrics``.
+
+    Args:
+        custom_metric_script (str): path to custom metric script
+
+    Returns:
+        types.ModuleType: custom metric module
+    """
+    with open(custom_metric_script) as f:
+        source = f.read()
+    sys.modules.setdefault("cpdflow_metrics", metrics_)
+    custom_metric = types.ModuleType("custom_metric")
+    exec(compile(source, custom_metric_script, "exec"), custom_metric.__dict__)
+    return custom_metric
+
+
+def read_feedback(file_name: str) -> pd.DataFrame:
+    """
+    Read feedback records from a csv or parquet file.
+
+    Args:
+        file_name (str): path to csv or parquet file
+
+    Returns:
+        pd.DataFrame: feedback records
+    """
+    if file_name.endswith(".parquet"):
+        return pd.read_parquet(file_name)
+    return pd.read_csv(file_name)
+
+
+def validate_metrics(metrics: dict, metric_definitions: list, tags: list) -> list:
+    """
+    Validate metrics returned by a custom metric script against the metric and tag definitions of the custom monitor.
+
+    Args:
+        metrics (dict): metrics returned by the custom metric script
+        metric_definitions (list[dict]): metric definitions, e.g. ``[{"name": "disparate_impact_ratio", ...}]``
+        tags (list[dict]): tag definitions, e.g. ``[{"name": "region", ...}]``
+
+    Returns:
+        list[str]: validation errors
+    """
+    errors = []
+    if not isinstance(metrics, dict):
+        return [f"calculate_metrics must return a dictionary, got {type(metrics).__name__}."]
+    metric_names = [x["name"] for x in metric_definitions]
+    tag_names = [x["name"] for x in tags]
+    for x in metric_names:
+        if x not in metrics:
+            errors.append(f"metric {x} is defined in the custom monitor but not returned.")
+    for k, v in metrics.items():
+        if k in metric_names:
+            if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+                errors.append(f"metric {k} must be a finite number, got {v!r}.")
+        elif k not in tag_names:
+            errors.append(f"{k} is not defined as a metric or tag in the custom monitor.")
+    return errors
+
+
+def get_max_rss_mb() -> float:
+    """
+    Get peak resident memory of the process in megabytes.
+
+    Returns:
+        float: peak resident memory in megabytes, or None on platforms without the ``resource`` module, e.g. Windows
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        max_rss = max_rss / 1024
+    return round(max_rss / 1024, 3)
+
+
+def calculate_metrics(custom_metric: types.ModuleType, df: pd.DataFrame, page_size: int) -> dict:
+    """
+    Calculate metrics with custom metric script, accumulating the records in pages if the script defines ``accumulate`` and ``finalize``.
+
+    Args:
+        custom_metric (types.ModuleType): custom metric module
+        df (pd.DataFrame): feedback records
+        page_size (int): number of records in each page
+
+    Returns:
+        dict: metrics returned by the custom metric script
+    """
+    if hasattr(custom_metric, "accumulate") and hasattr(custom_metric, "finalize"):
+        state = {}
+        for i in range(0, len(df), page_size):
+            state = custom_metric.accumulate(df=df.iloc[i : i + page_size], state=state)
+        return custom_metric.finalize(state=state)
+    return custom_metric.calculate_metrics(df=df)
+
+
+def run(custom_metric_script: str, df: pd.DataFrame, metric_definitions: list, tags: list, page_size: int = 1000) -> dict:
+    """
+    Run custom metric script on feedback records and report the metrics, run time and peak memory.
+
+    If the script defines ``accumulate(df, state)`` and ``finalize(state)``, the records are accumulated in pages of ``page_size`` records,
+    as in the custom metrics provider function. Otherwise, ``calculate_metrics(df)`` is called with all records.
+    Metrics that are None or nan are left out, as they are not published by the custom metrics provider function.
+    Errors raised by the script are reported in the validation errors. The run time is measured without tracing memory,
+    and the script is run again with ``tracemalloc`` for the peak memory, as tracing slows down the script.
+
+    Args:
+        custom_metric_script (str): path to custom metric script
+        df (pd.DataFrame): feedback records
+        metric_definitions (list[dict]): metric definitions of the custom monitor
+        tags (list[dict]): tag definitions of the custom monitor
+        page_size (int): number of records in each page
+
+    Returns:
+        dict: metrics, validation errors, run time and peak memory
+    """
+    custom_metric = load_custom_metric_script(custom_metric_script=custom_metric_script)
+    _logger.info(f"METRICS - {'RUN':<15} - running ... {custom_metric_script} on {len(df)} records.")
+    metrics, errors, elapsed, peak = None, [], None, None
+    start = time.perf_counter()
+    try:
+        metrics = calculate_metrics(custom_metric=custom_metric, df=df, page_size=page_size)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        try:
+            calculate_metrics(custom_metric=custom_metric, df=df, page_size=page_size)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as ex:
+        _logger.warning(f"METRICS - {'RUN':<15} - {custom_metric_script} failed ... {type(ex).__name__}: {ex}")
+        errors.append(f"{type(ex).__name__}: {ex}")
+    if metrics is not None:
+        if isinstance(metrics, dict):
+            metrics = {k: v for k, v in metrics.items() if v is not None and v == v}
+        errors += validate_metrics(metrics=metrics, metric_definitions=metric_definitions, tags=tags)
+    results = {
+        "custom_metric_script": custom_metric_script,
+        "records": len(df),
+        "metrics": metrics,
+        "errors": errors,
+        "seconds": None if elapsed is None else round(elapsed, 3),
+        "peak_memory_mb": None if peak is None else round(peak / 1024 / 1024, 3),
+        "max_rss_mb": get_max_rss_mb(),
+    }
+    _logger.info(f"METRICS - {'RUN':<15} - completed in {results['seconds']}s with peak memory {results['peak_memory_mb']} MB and {len(errors)} errors.")
+    return results
@@ -0,0 +1,177 @@
+"""
+Group fairness metrics.
+
+Metrics are computed from counts of the privileged and unprivileged groups, so that counts of large or incremental
+feedback data can be added up with ``merge_group_counts`` before the metrics are computed.
+Metrics that cannot be computed, e.g. when a group has no records, are None instead of nan, which is not valid JSON.
+This module only depends on numpy and is shipped with the custom metrics provider function as ``cpdflow_metrics``.
+"""
+import numpy as np
+
+GROUPS = ["privileged", "unprivileged"]
+
+
+def get_group_counts(prot_attr, y_pred, priv_group, pos_label, y_true=None) -> dict:
+    """
+    Count predictions of the privileged and unprivileged groups.
+
+    Args:
+        prot_attr (array-like): protected attribute, e.g. ``df["Sex"]``
+        y_pred (array-like): predicted labels, e.g. ``df["_original_prediction"]``
+        priv_group: value or list of values of the privileged group, e.g. male
+        pos_label: favorable label, e.g. No Risk
+        y_true (array-like): true labels, required for equal opportunity and average odds
+
+    Returns:
+        dict: a dictionary of groups as keys and counts as values
+    """
+    prot_attr = np.asarray(prot_attr)
+    y_pred = np.asarray(y_pred) == pos_label
+    privileged = np.isin(prot_attr, priv_group if isinstance(priv_group, (list, tuple)) else [priv_group])
+    if y_true is not None:
+        y_true = np.asarray(y_true) == pos_label
+    counts = {}
+    for group, mask in zip(GROUPS, [privileged, ~privileged]):
+        counts[group] = {"total": int(np.count_nonzero(mask)), "positive": int(np.count_nonzero(mask & y_pred))}
+        if y_true is not None:
+            counts[group]["actual_positive"] = int(np.count_nonzero(mask & y_true))
+            counts[group]["true_positive"] = int(np.count_nonzero(mask & y_true & y_pred))
+            counts[group]["actual_negative"] = int(np.count_nonzero(mask & ~y_true))
+            counts[group]["false_positive"] = int(np.count_nonzero(mask & ~y_true & y_pred))
+    return counts
+
+
+def merge_group_counts(counts: dict, other: dict) -> dict:
+    """
+    Add up two group counts, e.g. a running state and the counts of new feedback data.
+
+    Args:
+        counts (dict): group counts
+        other (dict): group counts
+
+    Returns:
+        dict: group counts
+    """
+    merged = {}
+    for group in set(counts) | set(other):
+        keys = set(counts.get(group, {})) | set(other.get(group, {}))
+        merged[group] = {k: counts.get(group, {}).get(k, 0) + other.get(group, {}).get(k, 0) for k in keys}
+    return merged
+
+
+def get_rate(counts: dict, group: str, numerator: str, denominator: str) -> float:
+    """
+    Get rate of a group from group counts, or None if the denominator is zero.
+
+    Args:
+        counts (dict): group counts
+        group (str): privileged or unprivileged
+        numerator (str): count name, e.g. positive
+        denominator (str): count name, e.g. total
+
+    Returns:
+        float: rate
+    """
+    group_counts = counts.get(group, {})
+    if not group_counts.get(denominator):
+        return None
+    return group_counts.get(numerator, 0) / group_counts[denominator]
+
+
+def get_difference(unprivileged_rate: float, privileged_rate: float) -> float:
+    """
+    Get difference of the rates of the unprivileged and privileged groups, or None if either rate is None.
+
+    Args:
+        unprivileged_rate (float): rate of the unprivileged group
+        privileged_rate (float): rate of the privileged group
+
+    Returns:
+        float: difference of the rates
+    """
+    if unprivileged_rate is None or privileged_rate is None:
+        return None
+    return unprivileged_rate - privileged_rate
+
+
+def statistical_parity_difference(counts: dict) -> float:
+    """
+    Difference in the rate of favorable predictions of the unprivileged and privileged groups.
+
+    Args:
+        counts (dict): group counts
+
+    Returns:
+        float: statistical parity difference, or None if a group has no records
+    """
+    return get_difference(get_rate(counts, "unprivileged", "positive", "total"), get_rate(counts, "privileged", "positive", "total"))
+
+
+def disparate_impact_ratio(counts: dict) -> float:
+    """
+    Ratio of the rate of favorable predictions of the unprivileged and privileged groups.
+
+    Args:
+        counts (dict): group counts
+
+    Returns:
+        float: disparate impact ratio, or None if a group has no records or the privileged group has no favorable predictions
+    """
+    unprivileged_rate = get_rate(counts, "unprivileged", "positive", "total")
+    privileged_rate = get_rate(counts, "privileged", "positive", "total")
+    if unprivileged_rate is None or not privileged_rate:
+        return None
+    return unprivileged_rate / privileged_rate
+
+
+def equal_opportunity_difference(counts: dict) -> float:
+    """
+    Difference in the true positive rate of the unprivileged and privileged groups.
+
+    Args:
+        counts (dict): group counts with true labels
+
+    Returns:
+        float: equal opportunity difference, or None if a group has no actual positives
+    """
+    return get_difference(get_rate(counts, "unprivileged", "true_positive", "actual_positive"), get_rate(counts, "privileged", "true_positive", "actual_positive"))
+
+
+def average_odds_difference(counts: dict) -> float:
+    """
+    Average of the differences in the false positive rate and true positive rate of the unprivileged and privileged groups.
+
+    Args:
+        counts (dict): group counts with true labels
+
+    Returns:
+        float: average odds difference, or None if a group has no actual positives or negatives
+    """
+    false_positive_rate_difference = get_difference(get_rate(counts, "unprivileged", "false_positive", "actual_negative"), get_rate(counts, "privileged", "false_positive", "actual_negative"))
+    true_positive_rate_difference = equal_opportunity_difference(counts)
+    if false_positive_rate_difference is None or true_positive_rate_difference is None:
+        return None
+    return (false_positive_rate_difference + true_positive_rate_difference) / 2
+
+
+def get_fairness_metrics(counts: dict) -> dict:
+    """
+    Get all fairness metrics that can be computed from group counts.
+
+    Equal opportunity difference and average odds difference are only computed if the counts include true labels.
+    Metrics that cannot be computed are left out.
+
+    Args:
+        counts (dict): group counts
+
+    Returns:
+        dict: a dictionary of metric names as keys and metrics as values
+    """
+    metrics = {
+        "statistical_parity_difference": statistical_parity_difference(counts),
+        "disparate_impact_ratio": disparate_impact_ratio(counts),
+    }
+    if all("actual_positive" in counts.get(x, {}) for x in GROUPS):
+        metrics["equal_opportunity_difference"] = equal_opportunity_difference(counts)
+        metrics["average_odds_difference"] = average_odds_difference(counts)
+    return {k: v for k, v in metrics.items() if v is not None}
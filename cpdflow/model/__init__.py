@@ -2,4 +2,5 @@
 Run models.
 """
 
-from .model import run_model, get_input_data_schema
\ No newline at end of file
+from .model import run_model, train_models, package_model, get_fingerprint, get_metadata, get_input_data_schema
+from .schema import get_spark_type, infer_input_data_schema
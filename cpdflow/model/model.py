@@ -1,40 +1,482 @@
 """
 Run models.
 """
+import gzip
 import logging
-import importlib
+import importlib.metadata
+import importlib.util
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
 import pandas as pd
 
+from cpdflow.data import data
+from cpdflow.model import schema
+from cpdflow.utils import cache_utils
+
 _logger = logging.getLogger(__name__)
 
+LIBRARIES = ["numpy", "pandas", "scikit-learn", "scipy", "joblib"]
+
+MODEL_TYPE = "scikit-learn_1.0"
+SOFTWARE_SPEC = "runtime-22.1-py3.9"
+METADATA_KEYS = ["target", "input_data_schema", "custom_metrics", "custom_params", "custom_tags", "training_data", "exclude_columns"]
+
+
+def get_library_versions() -> dict:
+    """
+    Get versions of Python and the libraries used to train models.
+
+    Returns:
+        dict: a dictionary of library names as keys and versions as values
+    """
+    versions = {"python": sys.version}
+    for x in LIBRARIES:
+        try:
+            versions[x] = importlib.metadata.version(x)
+        except importlib.metadata.PackageNotFoundError:
+            versions[x] = None
+    return versions
+
+
+def get_model_cache_key(model_config: dict) -> str:
+    """
+    Get model cache key from the hash of the model script source, its data inputs, the sweep configuration and the library versions.
+
+    Data inputs are the files and urls listed in ``data_files`` of the model configuration. Files are fingerprinted by
+    their modified time and size, and urls by the ``ETag`` and ``Last-Modified`` headers. The key is kept in ``cache_key``
+    of the model configuration, so that the urls are only requested once per command, and is cleared by ``clear_model_cache_keys``.
+
+    Args:
+        model_config (dict): model configuration
+
+    Returns:
+        str: model cache key
+    """
+    if "cache_key" in model_config:
+        return model_config["cache_key"]
+    with open(model_config["model_script"], "rb") as f:
+        source = f.read().decode("utf-8")
+    data_files = [data.get_url_fingerprint(url=x) if x.startswith("http://") or x.startswith("https://") else cache_utils.get_file_fingerprint(file_name=x) for x in model_config.get("data_files", [])]
+    model_config["cache_key"] = cache_utils.get_hash({"source": source, "data_files": data_files, "sweep": {k: v for k, v in model_config.get("sweep", {}).items() if k != "n_jobs"}, "versions": get_library_versions()})
+    return model_config["cache_key"]
+
+
+def clear_model_cache_keys(model_configs: list) -> None:
+    """
+    Clear the model cache keys kept by ``get_model_cache_key``, so that the model scripts and data inputs are fingerprinted again by the next command.
+
+    Args:
+        model_configs (list[dict]): model configurations
+    """
+    for x in model_configs:
+        x.pop("cache_key", None)
+
+
+def get_model_cache_file_name(config: dict, model_config: dict) -> str:
+    """
+    Get path to the cached model artifact.
+
+    Args:
+        config (dict): configuration dictionary
+        model_config (dict): model configuration
+
+    Returns:
+        str: path to the cached model artifact
+    """
+    cache_dir = cache_utils.get_cache_dir(config=config, name="models")
+    return os.path.join(cache_dir, get_model_cache_key(model_config=model_config) + ".joblib")
+
+
+def get_model_module_name(model_script: str) -> str:
+    """
+    Get module name of the model script, which is the script name without the extension, e.g. ``german-credit-risk-sgd``.
+
+    Args:
+        model_script (str): path to model script
+
+    Returns:
+        str: module name
+    """
+    return os.path.splitext(os.path.basename(model_script))[0]
+
+
+def load_model_script(model_script: str) -> dict:
+    """
+    Load model script as a module and return its global variables.
+
+    The script is loaded from its path as a module named by ``get_model_module_name`` and registered in ``sys.modules``,
+    so that functions and classes defined in the script are pickled by reference with the model, as with ``importlib.import_module``.
+    The script is executed again on every call and replaces the module of the previous call, as it is only run when the model is not found in the model cache.
+
+    Args:
+        model_script (str): path to model script
+
+    Returns:
+        dict: global variables of the model script
+    """
+    path = os.path.abspath(model_script)
+    module_name = get_model_module_name(model_script=path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    script_dir = os.path.dirname(path)
+    sys.path.insert(0, script_dir)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    finally:
+        sys.path.remove(script_dir)
+    return module.__dict__
+
+
+def run_sweep(model_name: str, namespace: dict, sweep_config: dict) -> tuple:
+    """
+    Fit every combination of parameters of the model in the model script with cross validation and return the best model.
+
+    The sweep configuration is given with ``sweep`` in the model configuration, e.g.
+    ``{"param_grid": {"clf__n_estimators": [100, 200]}, "scoring": "average_precision", "cv": 5, "n_jobs": -1}``.
+    Candidates are fitted in a process pool by ``GridSearchCV``, which memory-maps the training data ``X`` and ``y``
+    so that it is shared read-only by the worker processes.
+
+    Args:
+        model_name (str): model name
+        namespace (dict): global variables of the model script with ``model``, ``X`` and ``y``
+        sweep_config (dict): sweep configuration
+
+    Returns:
+        tuple: best model and a dictionary of the cross validation scores of the other candidates as custom metrics
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import GridSearchCV
+
+    scoring = sweep_config.get("scoring")
+    search = GridSearchCV(
+        estimator=clone(namespace["model"]),
+        param_grid=sweep_config["param_grid"],
+        scoring=scoring,
+        cv=sweep_config.get("cv", 5),
+        n_jobs=sweep_config.get("n_jobs", -1),
+        refit=True,
+    )
+    search.fit(namespace["X"], namespace["y"])
+    metric_name = scoring or "score"
+    custom_metrics = {}
+    for i, (params, score) in enumerate(zip(search.cv_results_["params"], search.cv_results_["mean_test_score"])):
+        if i != search.best_index_:
+            custom_metrics[f"sweep_{i}_{metric_name}"] = float(score)
+        _logger.info(f"SWEEP - {model_name} - candidate {i} - {metric_name} {score:.4f} - {params}.")
+    _logger.info(f"SWEEP - {model_name} - best candidate {search.best_index_} - {metric_name} {search.best_score_:.4f} - {search.best_params_}.")
+    return search.best_estimator_, custom_metrics
+
+
+def run_model_script(model_config: dict) -> dict:
+    """
+    Run model script and return the model artifact.
+
+    If ``sweep`` is set in the model configuration, the model is the best candidate of the sweep and the scores of the other candidates are added to the custom metrics.
 
-def run_model(model_config: dict, log_format: str) -> None:
+    Args:
+        model_config (dict): model configuration
+
+    Returns:
+        dict: a dictionary with the fitted model, custom metrics, params and tags, input data schema and target
+    """
+    namespace = load_model_script(model_script=model_config["model_script"])
+    artifact = {
+        "custom_metrics": namespace["custom_metrics"],
+        "custom_params": namespace.get("custom_params", {}),
+        "custom_tags": namespace.get("custom_tags", {}),
+        "input_data_schema": namespace["input_data_schema"],
+        "target": namespace["y"].name,
+    }
+    if "model" in namespace:
+        artifact["model"] = namespace["model"]
+    if model_config.get("sweep"):
+        artifact["model"], sweep_metrics = run_sweep(model_name=model_config["model_name"], namespace=namespace, sweep_config=model_config["sweep"])
+        artifact["custom_metrics"] = {**artifact["custom_metrics"], **sweep_metrics}
+    return artifact
+
+
+def run_model(config: dict, model_config: dict, log_format: str) -> None:
     """
     Run model and assigns the following to the `model_config` dictionary.
 
     - model: a fitted model
     - custom metrics: additional metrics to log in Factsheets
+    - custom params and custom tags: optional params and tags to log in Factsheets
     - input data schema: schema of the training data
     - target: column name of target variable
 
+    If ``cache`` is set in the model configuration, the results are cached locally and keyed by the hash of the model script source,
+    its ``data_files`` and the library versions, so that unchanged models are loaded from the cache instead of being trained again.
+    Every data input of the model script must be declared in ``data_files``, otherwise a stale model is loaded when it changes.
+
     Args:
         config (dict): configuration dictionary
+        model_config (dict): model configuration
         log_format (str): log format for this method
 
     """
     model_name = model_config["model_name"]
-    _logger.info(f"{log_format} - running model ... {model_name}.")
-    model_module = importlib.import_module(model_config["model_script"].replace(".py", ""))
-    if hasattr(model_module, "model"):
-        model_config["model"] = model_module.model
-    model_config["custom_metrics"] = model_module.custom_metrics
-    model_config["input_data_schema"] = model_module.input_data_schema
-    model_config["target"] = model_module.y.name
+    use_cache = model_config.get("cache", False)
+    cache_file_name = get_model_cache_file_name(config=config, model_config=model_config) if use_cache else None
+    if use_cache and os.path.exists(cache_file_name):
+        _logger.info(f"{log_format} - loading cached model ... {model_name}.")
+        # functions and classes defined in the model script are imported from the model script, as they are pickled by reference
+        script_dir = os.path.dirname(os.path.abspath(model_config["model_script"]))
+        sys.path.insert(0, script_dir)
+        try:
+            artifact = joblib.load(cache_file_name)
+        finally:
+            sys.path.remove(script_dir)
+    else:
+        _logger.info(f"{log_format} - running model ... {model_name}.")
+        artifact = run_model_script(model_config=model_config)
+        if use_cache:
+            tmp_file_name = f"{cache_file_name}.{os.getpid()}.tmp"
+            joblib.dump(artifact, tmp_file_name)
+            os.replace(tmp_file_name, cache_file_name)
+    for x in ["artifact_path", "artifact_hash", "artifact_size", "fingerprint"]:
+        model_config.pop(x, None)
+    model_config.update(artifact)
     # model_config["X"] = model_module.X
     # model_config["y"] = model_module.y
     _logger.info(f"{log_format} - run_model completed for {model_name}.")
 
 
+def train_model_worker(model_config: dict, cache_file_name: str, memory_limit_mb: int = None) -> str:
+    """
+    Run model script in a worker process and save the model artifact to the model cache.
+
+    The memory limit caps the virtual address space of the worker process with ``RLIMIT_AS`` on Unix, which is larger than the
+    resident memory, e.g. with the memory arenas reserved by BLAS threads, so the limit should leave headroom to avoid a spurious ``MemoryError``.
+    The previous limit is restored afterwards, as worker processes are reused for the next model.
+
+    Args:
+        model_config (dict): model configuration
+        cache_file_name (str): path to the cached model artifact
+        memory_limit_mb (int): maximum virtual memory of the worker process in megabytes
+
+    Returns:
+        str: path to the cached model artifact
+    """
+    limit = None
+    if memory_limit_mb:
+        import resource
+
+        limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_mb * 1024 * 1024, limit[1]))
+    try:
+        artifact = run_model_script(model_config=model_config)
+        tmp_file_name = f"{cache_file_name}.{os.getpid()}.tmp"
+        joblib.dump(artifact, tmp_file_name)
+        os.replace(tmp_file_name, cache_file_name)
+        if model_config.get("sweep"):
+            # stop the sweep processes, otherwise the worker process waits for them to time out before exiting
+            from joblib.externals.loky import get_reusable_executor
+
+            get_reusable_executor().shutdown(wait=True)
+    finally:
+        if limit:
+            resource.setrlimit(resource.RLIMIT_AS, limit)
+    return cache_file_name
+
+
+def train_models(config: dict, model_configs: list, log_format: str) -> None:
+    """
+    Train models in a process pool and save the model artifacts to the model cache.
+
+    Enabled with ``training`` in the configuration, e.g. ``{"max_workers": 4, "memory_limit_mb": 4096}``.
+    ``memory_limit_mb`` can be overridden in the model configuration. Sweeps without ``n_jobs`` or with ``n_jobs`` of ``-1`` share the
+    CPUs between the workers, so that the worker processes are not oversubscribed. Only models with ``cache`` set are trained, and models
+    that are already cached are skipped, so that ``run_model`` loads the trained models from the cache afterwards.
+
+    Args:
+        config (dict): configuration dictionary
+        model_configs (list[dict]): models to be trained
+        log_format (str): log format for this method
+    """
+    if "training" not in config:
+        return
+    training_config = config["training"]
+    model_configs = [x for x in model_configs if x.get("cache", False)]
+    cache_file_names = {x["model_name"]: get_model_cache_file_name(config=config, model_config=x) for x in model_configs}
+    model_configs = [x for x in model_configs if not os.path.exists(cache_file_names[x["model_name"]])]
+    if not model_configs:
+        _logger.info(f"{log_format} - Nothing to train.")
+        return
+
+    max_workers = training_config.get("max_workers", os.cpu_count())
+    _logger.info(f"{log_format} - training {len(model_configs)} models with {max_workers} workers ... {[x['model_name'] for x in model_configs]}.")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {}
+        for model_config in model_configs:
+            model_name = model_config["model_name"]
+            memory_limit_mb = model_config.get("memory_limit_mb", training_config.get("memory_limit_mb"))
+            worker_model_config = {k: v for k, v in model_config.items() if k in ["model_name", "model_script", "sweep"]}
+            if worker_model_config.get("sweep") and worker_model_config["sweep"].get("n_jobs", -1) == -1:
+                worker_model_config["sweep"] = {**worker_model_config["sweep"], "n_jobs": max(1, os.cpu_count() // max_workers)}
+            futures[model_name] = executor.submit(train_model_worker, model_config=worker_model_config, cache_file_name=cache_file_names[model_name], memory_limit_mb=memory_limit_mb)
+        for model_name, future in futures.items():
+            future.result()
+            _logger.info(f"{log_format} - trained {model_name}.")
+    _logger.info(f"{log_format} - train_models completed.")
+
+
+def reset_tarinfo(tarinfo: tarfile.TarInfo) -> tarfile.TarInfo:
+    """
+    Reset modified time and owner of a file in the model artifact, so that the same model is always packaged into the same artifact.
+
+    Args:
+        tarinfo (tarfile.TarInfo): file in the model artifact
+
+    Returns:
+        tarfile.TarInfo: file in the model artifact
+    """
+    tarinfo.mtime = 0
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ""
+    return tarinfo
+
+
+def package_model(config: dict, model_config: dict, log_format: str) -> str:
+    """
+    Package model into a compressed artifact and assigns the following to the `model_config` dictionary.
+
+    - artifact_path: path to the model artifact
+    - artifact_hash: sha256 hash of the model artifact
+    - artifact_size: size of the model artifact in bytes
+
+    The model is saved once with joblib, which writes numpy arrays uncompressed so that they can be memory-mapped,
+    and archived in a gzip compressed ``tar.gz`` that is named by the hash of the saved model and reused to store and update the model.
+
+    Args:
+        config (dict): configuration dictionary
+        model_config (dict): model configuration
+        log_format (str): log format for this method
+
+    Returns:
+        str: path to the model artifact
+    """
+    model_name = model_config["model_name"]
+    if "artifact_path" in model_config and os.path.exists(model_config["artifact_path"]):
+        return model_config["artifact_path"]
+    cache_dir = cache_utils.get_cache_dir(config=config, name="artifacts")
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp_dir:
+        model_file_name = os.path.join(tmp_dir, "model.pkl")
+        joblib.dump(model_config["model"], model_file_name)
+        artifact_path = os.path.join(cache_dir, cache_utils.get_file_hash(file_name=model_file_name) + ".tar.gz")
+        if not os.path.exists(artifact_path):
+            _logger.info(f"{log_format} - packaging model ... {model_name}.")
+            tmp_artifact_path = os.path.join(tmp_dir, "model.tar.gz")
+            with open(tmp_artifact_path, "wb") as f, gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as gz, tarfile.open(fileobj=gz, mode="w") as tar:
+                tar.add(model_file_name, arcname="model.pkl", filter=reset_tarinfo)
+            os.replace(tmp_artifact_path, artifact_path)
+    model_config["artifact_path"] = artifact_path
+    model_config["artifact_hash"] = cache_utils.get_file_hash(file_name=artifact_path)
+    model_config["artifact_size"] = os.path.getsize(artifact_path)
+    _logger.info(f"{log_format} - package_model completed for {model_name}, {model_config['artifact_size'] / 1024 / 1024:.2f} MB, sha256 {model_config['artifact_hash'][:12]}.")
+    return artifact_path
+
+
+def get_fingerprint(config: dict, model_config: dict, log_format: str) -> str:
+    """
+    Get model fingerprint from the model artifact hash, model type, software specification, target and input data schema.
+
+    The fingerprint is stored with the model in Watson Machine Learning, so that unchanged models are not updated, promoted or deployed again.
+
+    Args:
+        config (dict): configuration dictionary
+        model_config (dict): model configuration
+        log_format (str): log format for this method
+
+    Returns:
+        str: model fingerprint
+    """
+    package_model(config=config, model_config=model_config, log_format=log_format)
+    model_config["fingerprint"] = cache_utils.get_hash(
+        {
+            "artifact_hash": model_config["artifact_hash"],
+            "model_type": model_config.get("model_type", MODEL_TYPE),
+            "software_spec": model_config.get("software_spec", SOFTWARE_SPEC),
+            "target": model_config["target"],
+            "input_data_schema": model_config["input_data_schema"],
+        }
+    )
+    return model_config["fingerprint"]
+
+
+def get_metadata_file_name(model_config: dict) -> str:
+    """
+    Get path to the metadata file of the model script.
+
+    Defaults to the model script name with a ``.meta.json`` extension, e.g. ``german-credit-risk-custom.meta.json``.
+
+    Args:
+        model_config (dict): model configuration
+
+    Returns:
+        str: path to the metadata file
+    """
+    return model_config.get("metadata_file", os.path.splitext(model_config["model_script"])[0] + ".meta.json")
+
+
+def get_metadata(config: dict, model_config: dict, log_format: str) -> None:
+    """
+    Get model metadata without training the model and assigns the following to the `model_config` dictionary.
+
+    - custom metrics: additional metrics to log in Factsheets
+    - input data schema: schema of the training data
+    - target: column name of target variable
+
+    The metadata is loaded from the model cache if the model has been run, otherwise from the metadata file
+    and the model configuration. If ``input_data_schema`` is not given, it is inferred from up to ``sample_rows`` rows of
+    ``training_data`` without the ``target`` and ``exclude_columns`` columns. If no metadata is found, the model script is run.
+
+    Args:
+        config (dict): configuration dictionary
+        model_config (dict): model configuration
+        log_format (str): log format for this method
+    """
+    model_name = model_config["model_name"]
+    if model_config.get("cache", False) and os.path.exists(get_model_cache_file_name(config=config, model_config=model_config)):
+        run_model(config=config, model_config=model_config, log_format=log_format)
+        return
+
+    metadata = {}
+    metadata_file_name = get_metadata_file_name(model_config=model_config)
+    if os.path.exists(metadata_file_name):
+        with open(metadata_file_name) as f:
+            metadata = json.load(f)
+    metadata.update({k: model_config[k] for k in METADATA_KEYS if k in model_config})
+
+    if "target" not in metadata or ("input_data_schema" not in metadata and "training_data" not in metadata):
+        _logger.info(f"{log_format} - no metadata found, running model ... {model_name}.")
+        run_model(config=config, model_config=model_config, log_format=log_format)
+        return
+
+    if "input_data_schema" not in metadata:
+        _logger.info(f"{log_format} - inferring input data schema ... {metadata['training_data']}.")
+        exclude_columns = [metadata["target"]] + metadata.get("exclude_columns", [])
+        metadata["input_data_schema"] = schema.infer_input_data_schema(file_name=metadata["training_data"], exclude_columns=exclude_columns, sample_rows=model_config.get("sample_rows", 10000))
+
+    model_config["target"] = metadata["target"]
+    model_config["input_data_schema"] = metadata["input_data_schema"]
+    model_config["custom_metrics"] = metadata.get("custom_metrics", {})
+    model_config["custom_params"] = metadata.get("custom_params", {})
+    model_config["custom_tags"] = metadata.get("custom_tags", {})
+    _logger.info(f"{log_format} - get_metadata completed for {model_name}.")
+
+
 def get_input_data_schema(X: pd.DataFrame) -> list:
     """
     Get input data schema.
@@ -0,0 +1,140 @@
+"""
+Infer input data schema.
+"""
+import json
+import logging
+import os
+
+import pandas as pd
+import pyarrow
+import pyarrow.parquet
+
+from cpdflow.data import data
+from cpdflow.utils import cache_utils
+
+_logger = logging.getLogger(__name__)
+
+SPARK_TYPES = {"bool": "boolean", "int32": "integer", "int64": "long", "float32": "float", "float64": "double", "datetime64[ns]": "timestamp"}
+
+
+def get_spark_type(dtype: str) -> str:
+    """
+    Get Spark type of a data frame dtype.
+
+    Args:
+        dtype (str): data frame dtype, e.g. int64
+
+    Returns:
+        str: Spark type, e.g. long
+    """
+    if dtype in SPARK_TYPES:
+        return SPARK_TYPES[dtype]
+    if dtype.startswith("int") or dtype.startswith("uint"):
+        return "long"
+    if dtype.startswith("float"):
+        return "double"
+    if dtype.startswith("datetime64"):
+        return "timestamp"
+    return "string"
+
+
+def get_arrow_dtype(arrow_type: pyarrow.DataType) -> str:
+    """
+    Get data frame dtype of an Arrow type.
+
+    Args:
+        arrow_type (pyarrow.DataType): Arrow type
+
+    Returns:
+        str: data frame dtype
+    """
+    if pyarrow.types.is_boolean(arrow_type):
+        return "bool"
+    if pyarrow.types.is_integer(arrow_type):
+        return "int64"
+    if pyarrow.types.is_floating(arrow_type) or pyarrow.types.is_decimal(arrow_type):
+        return "float64"
+    if pyarrow.types.is_timestamp(arrow_type) or pyarrow.types.is_date(arrow_type):
+        return "datetime64[ns]"
+    return "object"
+
+
+def infer_dtype(values: pd.Series) -> str:
+    """
+    Infer data frame dtype of string values.
+
+    Args:
+        values (pd.Series): string values
+
+    Returns:
+        str: data frame dtype
+    """
+    values = values.dropna().str.strip()
+    values = values[values != ""]
+    if values.empty:
+        return "object"
+    lower = values.str.lower()
+    if lower.isin(["true", "false"]).all():
+        return "bool"
+    if pd.to_numeric(values, errors="coerce").notna().all():
+        return "int64" if values.str.fullmatch(r"[+-]?\d+").all() else "float64"
+    if values.str.contains(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4}").all():
+        if pd.to_datetime(values, errors="coerce", format="mixed").notna().all():
+            return "datetime64[ns]"
+    return "object"
+
+
+def infer_input_data_schema(file_name: str, exclude_columns: list = None, sample_rows: int = 10000, chunksize: int = 10000) -> list:
+    """
+    Infer input data schema of a csv or parquet training data file without loading it in memory.
+
+    Csv files are read in chunks up to ``sample_rows`` rows and the types are inferred from the sample.
+    Parquet files are read from the file schema. The inferred schema is cached next to the data, e.g. ``training.csv.schema.json``.
+    Csv files given by url are read with ``cpdflow.data.read_csv``, which caches the downloaded file, and the schema is not cached.
+
+    Args:
+        file_name (str): path to csv or parquet file, or url of csv file
+        exclude_columns (list[str]): columns to exclude, e.g. target
+        sample_rows (int): maximum number of rows to infer types from
+        chunksize (int): number of rows to read at a time
+
+    Returns:
+        list[dict]: a list of dictionary from training fields.
+    """
+    exclude_columns = exclude_columns or []
+    if file_name.startswith("http://") or file_name.startswith("https://"):
+        _logger.info(f"SCHEMA - inferring input data schema ... {file_name}.")
+        df = data.read_csv(url=file_name, dtype=str, keep_default_na=True)
+        df = df.drop(columns=[x for x in exclude_columns if x in df.columns]).head(sample_rows)
+        fields = [{"name": x, "type": infer_dtype(df[x])} for x in df.columns]
+        return [{"id": "input_data_schema", "type": "list", "fields": fields}]
+    params = {**cache_utils.get_file_fingerprint(file_name=file_name), "exclude_columns": exclude_columns, "sample_rows": sample_rows}
+    schema_file_name = file_name + ".schema.json"
+    if os.path.exists(schema_file_name):
+        with open(schema_file_name) as f:
+            cached_schema = json.load(f)
+        if cached_schema["params"] == json.loads(json.dumps(params)):
+            return cached_schema["input_data_schema"]
+
+    _logger.info(f"SCHEMA - inferring input data schema ... {file_name}.")
+    if file_name.endswith(".parquet"):
+        arrow_schema = pyarrow.parquet.read_schema(file_name)
+        fields = [{"name": x.name, "type": get_arrow_dtype(x.type)} for x in arrow_schema if x.name not in exclude_columns]
+    else:
+        chunks = []
+        num_rows = 0
+        for chunk in pd.read_csv(file_name, dtype=str, keep_default_na=True, chunksize=chunksize, usecols=lambda x: x not in exclude_columns):
+            chunks.append(chunk.head(sample_rows - num_rows))
+            num_rows += len(chunks[-1])
+            if num_rows >= sample_rows:
+                break
+        df = pd.concat(chunks)
+        fields = [{"name": x, "type": infer_dtype(df[x])} for x in df.columns]
+
+    input_data_schema = [{"id": "input_data_schema", "type": "list", "fields": fields}]
+    try:
+        with open(schema_file_name, "w") as f:
+            json.dump({"params": params, "input_data_schema": input_data_schema}, f, indent=4)
+    except OSError as ex:
+        _logger.warning(f"SCHEMA - unable to cache input data schema ... {schema_file_name}: {ex}")
+    return input_data_schema
@@ -0,0 +1,68 @@
+"""
+Local cache utilities.
+"""
+import hashlib
+import json
+import os
+
+CACHE_DIR = ".cpdflow"
+
+
+def get_cache_dir(config: dict, name: str) -> str:
+    """
+    Get cache directory, creating it if it does not exist.
+
+    Args:
+        config (dict): configuration dictionary
+        name (str): name of the cache, e.g. payloads
+
+    Returns:
+        str: path to the cache directory
+    """
+    cache_dir = os.path.join(config.get("cache_dir", CACHE_DIR), name)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_file_fingerprint(file_name: str) -> dict:
+    """
+    Get file fingerprint from the file path, modified time and size.
+
+    Args:
+        file_name (str): path to file
+
+    Returns:
+        dict: a dictionary of file path, modified time and size
+    """
+    stat = os.stat(file_name)
+    return {"path": os.path.abspath(file_name), "mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def get_file_hash(file_name: str) -> str:
+    """
+    Get sha256 hash of a file, read in blocks.
+
+    Args:
+        file_name (str): path to file
+
+    Returns:
+        str: hex digest
+    """
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for x in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(x)
+    return sha256.hexdigest()
+
+
+def get_hash(value) -> str:
+    """
+    Get sha256 hash of a json serializable value.
+
+    Args:
+        value: json serializable value
+
+    Returns:
+        str: hex digest
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
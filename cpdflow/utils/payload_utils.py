@@ -0,0 +1,128 @@
+"""
+Payload utilities.
+"""
+import glob
+import json
+import logging
+import os
+
+import pandas as pd
+import pyarrow
+import pyarrow.feather
+
+from cpdflow.utils import cache_utils, sample_utils
+
+_logger = logging.getLogger(__name__)
+
+
+SAMPLE_KEYS = ["max_rows", "sample_strategy", "seed", "label"]
+SOURCE_ROWS_KEY = b"cpdflow_source_rows"
+
+
+def write_payload(df: pd.DataFrame, file_name: str) -> None:
+    """
+    Write payload in Feather format with the number of rows in the source file, from ``attrs["source_rows"]``, in the schema metadata.
+
+    Args:
+        df (pd.DataFrame): payload
+        file_name (str): path to Feather file
+    """
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_ROWS_KEY: json.dumps(df.attrs.get("source_rows")).encode("utf-8")})
+    pyarrow.feather.write_feather(table, file_name)
+
+
+def load_payload(file_name: str) -> pd.DataFrame:
+    """
+    Load payload from a Feather file written by ``write_payload``, memory-mapped.
+
+    Args:
+        file_name (str): path to Feather file
+
+    Returns:
+        pd.DataFrame: payload with the number of rows in the source file in ``attrs["source_rows"]``, which is not set for older cached payloads
+    """
+    table = pyarrow.feather.read_table(file_name, memory_map=True)
+    df = table.to_pandas()
+    metadata = table.schema.metadata or {}
+    if SOURCE_ROWS_KEY in metadata:
+        df.attrs["source_rows"] = json.loads(metadata[SOURCE_ROWS_KEY])
+    return df
+
+
+def read_payload(config: dict, payload_config: dict) -> pd.DataFrame:
+    """
+    Read payload from a csv file.
+
+    The parsed payload is cached in Feather format and keyed by the file path, modified time and size,
+    so that the csv file is only parsed again when it changes. Cached payloads are memory-mapped on load,
+    and older cached copies of the same file are removed when it is parsed again.
+    The payload is always read back from the Feather file, so that the data types are the same in every run.
+    The number of rows in the csv file is kept with the cached payload in ``attrs["source_rows"]``, except for the head strategy.
+
+    If ``max_rows`` is set in the payload configuration, the csv file is sampled in a single pass with
+    ``sample_strategy`` (head, reservoir or stratified by ``label``) and ``seed``.
+
+    Args:
+        config (dict): configuration dictionary
+        payload_config (dict): payload configuration, e.g. ``{"file_name": "scoring.csv", "max_rows": 1000}``
+
+    Returns:
+        pd.DataFrame: payload
+    """
+    file_name = payload_config["file_name"]
+    sample_config = {k: payload_config[k] for k in SAMPLE_KEYS if k in payload_config}
+    cache_dir = cache_utils.get_cache_dir(config=config, name="payloads")
+    cache_prefix = cache_utils.get_hash({"path": os.path.abspath(file_name), **sample_config})
+    cache_key = cache_utils.get_hash(cache_utils.get_file_fingerprint(file_name=file_name))
+    cache_file_name = os.path.join(cache_dir, f"{cache_prefix}-{cache_key}.feather")
+    if os.path.exists(cache_file_name):
+        df = load_payload(file_name=cache_file_name)
+        # payloads cached without the number of rows in the csv file are parsed again
+        if "source_rows" in df.attrs:
+            _logger.info(f"PAYLOAD - loading cached payload ... {file_name}.")
+            return df
+    if "max_rows" in sample_config:
+        _logger.info(f"PAYLOAD - sampling payload ... {file_name} with {sample_config}.")
+        df = sample_utils.sample_csv(file_name=file_name, **sample_config)
+    else:
+        _logger.info(f"PAYLOAD - parsing payload ... {file_name}.")
+        df = pd.read_csv(file_name)
+        df.attrs["source_rows"] = len(df)
+    tmp_file_name = f"{cache_file_name}.{os.getpid()}.tmp"
+    write_payload(df=df, file_name=tmp_file_name)
+    os.replace(tmp_file_name, cache_file_name)
+    for x in glob.glob(os.path.join(cache_dir, f"{cache_prefix}-*.feather")):
+        if x != cache_file_name:
+            os.remove(x)
+    return load_payload(file_name=cache_file_name)
+
+
+def get_scoring_payload(config: dict) -> dict:
+    """
+    Get scoring payload from the configured scoring and meta payload files.
+
+    The meta payload is sampled with the sampling configuration of the scoring payload. The ``head`` and ``reservoir`` strategies
+    sample files with the same number of rows at the same rows, so that the rows of both payloads match.
+    The scoring and meta payload files must have the same number of rows.
+    The ``stratified`` strategy samples rows by label and cannot be used for the scoring payload.
+
+    Args:
+        config (dict): configuration dictionary
+
+    Returns:
+        dict: scoring payload
+    """
+    if "max_rows" in config["scoring_payload"] and config["scoring_payload"].get("sample_strategy", "reservoir") == "stratified":
+        raise ValueError("The stratified sample_strategy cannot be used for the scoring payload, as the meta payload rows would not match. Use head or reservoir.")
+    df_scoring_payload = read_payload(config=config, payload_config=config["scoring_payload"])
+    meta_payload_config = {k: v for k, v in config["scoring_payload"].items() if k != "label"}
+    df_meta_payload = read_payload(config=config, payload_config={**meta_payload_config, "file_name": config["meta_payload"]["file_name"]})
+    scoring_rows, meta_rows = df_scoring_payload.attrs.get("source_rows"), df_meta_payload.attrs.get("source_rows")
+    if scoring_rows is not None and meta_rows is not None and scoring_rows != meta_rows:
+        raise ValueError(f"The scoring payload file has {scoring_rows} rows and the meta payload file has {meta_rows} rows, they must have the same number of rows.")
+    if len(df_meta_payload) != len(df_scoring_payload):
+        raise ValueError(f"The scoring payload has {len(df_scoring_payload)} rows and the meta payload has {len(df_meta_payload)} rows, they must have the same number of rows.")
+    meta_payload = {"fields": df_meta_payload.columns.tolist(), "values": df_meta_payload.values.tolist()}
+    scoring_payload = {"input_data": [{"fields": df_scoring_payload.columns.tolist(), "values": df_scoring_payload.values.tolist(), "meta": meta_payload}]}
+    return scoring_payload
@@ -0,0 +1,127 @@
+"""
+Sampling utilities.
+"""
+import numpy as np
+import pandas as pd
+
+SAMPLE_STRATEGIES = ["head", "reservoir", "stratified"]
+
+
+def update_reservoir(slots: np.ndarray, seen: int, indices: np.ndarray, max_rows: int, rng: np.random.Generator) -> tuple:
+    """
+    Update reservoir with new rows using Algorithm R.
+
+    Args:
+        slots (np.ndarray): row indices in the reservoir
+        seen (int): number of rows seen so far
+        indices (np.ndarray): row indices of new rows
+        max_rows (int): size of the reservoir
+        rng (np.random.Generator): random number generator
+
+    Returns:
+        tuple: row indices in the reservoir and number of rows seen so far
+    """
+    fill = min(max(max_rows - len(slots), 0), len(indices))
+    slots = np.concatenate([slots, indices[:fill]])
+    seen += fill
+    indices = indices[fill:]
+    if len(indices):
+        positions = rng.integers(0, np.arange(seen, seen + len(indices)) + 1)
+        mask = positions < max_rows
+        for position, index in zip(positions[mask], indices[mask]):
+            slots[position] = index
+        seen += len(indices)
+    return slots, seen
+
+
+def get_quotas(counts: dict, max_rows: int) -> dict:
+    """
+    Get number of rows to sample for each label in proportion to the label counts.
+
+    Args:
+        counts (dict): a dictionary of labels as keys and number of rows as values
+        max_rows (int): number of rows to sample
+
+    Returns:
+        dict: a dictionary of labels as keys and number of rows to sample as values
+    """
+    total = sum(counts.values())
+    max_rows = min(max_rows, total)
+    quotas = {k: v * max_rows / total for k, v in counts.items()}
+    floors = {k: int(v) for k, v in quotas.items()}
+    remainders = sorted(quotas, key=lambda k: (quotas[k] - floors[k], counts[k]), reverse=True)
+    for k in remainders[: max_rows - sum(floors.values())]:
+        floors[k] += 1
+    return floors
+
+
+def sample_csv(file_name: str, max_rows: int, sample_strategy: str = "reservoir", seed: int = 0, label: str = None, chunksize: int = 10000) -> pd.DataFrame:
+    """
+    Sample rows from a csv file in a single pass without loading the file in memory.
+
+    The sample strategies are,
+
+    - head: the first ``max_rows`` rows
+    - reservoir: a uniform random sample of ``max_rows`` rows
+    - stratified: a uniform random sample of each ``label`` value, in proportion to the number of rows of each value
+
+    Samples are seeded with ``seed`` and the sampled rows are returned in the order of the csv file.
+    Files with the same number of rows are sampled at the same rows with the head and reservoir strategies.
+    The number of rows in the csv file is kept in ``attrs["source_rows"]`` of the sampled rows, except with the head strategy,
+    which does not read the whole file.
+
+    Args:
+        file_name (str): path to csv file
+        max_rows (int): maximum number of rows to sample
+        sample_strategy (str): head, reservoir or stratified
+        seed (int): random seed
+        label (str): label column for the stratified strategy
+        chunksize (int): number of rows to read at a time
+
+    Returns:
+        pd.DataFrame: sampled rows
+    """
+    if sample_strategy not in SAMPLE_STRATEGIES:
+        raise ValueError(f"sample_strategy must be one of {SAMPLE_STRATEGIES}, got {sample_strategy}.")
+    if sample_strategy == "stratified" and not label:
+        raise ValueError("label is required for the stratified sample_strategy.")
+    if sample_strategy == "head":
+        return pd.read_csv(file_name, nrows=max_rows)
+
+    rng = np.random.default_rng(seed)
+    reservoirs = {}
+    kept = []
+    num_kept = 0
+    offset = 0
+    for chunk in pd.read_csv(file_name, chunksize=chunksize):
+        chunk.index = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        if sample_strategy == "reservoir":
+            groups = [(None, chunk.index.values)]
+        else:
+            groups = sorted(chunk.groupby(label, dropna=False).indices.items(), key=lambda x: str(x[0]))
+            groups = [(k, chunk.index.values[v]) for k, v in groups]
+        for key, indices in groups:
+            slots, seen = reservoirs.get(key, (np.empty(0, dtype=np.int64), 0))
+            reservoirs[key] = update_reservoir(slots=slots, seen=seen, indices=indices, max_rows=max_rows, rng=rng)
+        slots = np.concatenate([x[0] for x in reservoirs.values()])
+        chunk = chunk[chunk.index.isin(slots)]
+        kept.append(chunk)
+        num_kept += len(chunk)
+        # rows replaced in the reservoir are only dropped once the kept rows double, so that each row is filtered a bounded number of times
+        if num_kept > 2 * len(slots):
+            kept = [pd.concat(kept).loc[lambda x: x.index.isin(slots)]]
+            num_kept = len(kept[0])
+
+    if sample_strategy == "stratified" and reservoirs:
+        quotas = get_quotas(counts={k: v[1] for k, v in reservoirs.items()}, max_rows=max_rows)
+        slots = np.concatenate([rng.choice(reservoirs[k][0], size=v, replace=False) for k, v in sorted(quotas.items(), key=lambda x: str(x[0]))])
+    else:
+        slots = np.concatenate([x[0] for x in reservoirs.values()]) if reservoirs else np.empty(0, dtype=np.int64)
+
+    if not kept:
+        df = pd.read_csv(file_name, nrows=0)
+    else:
+        df = pd.concat(kept).loc[np.sort(slots)].reset_index(drop=True)
+    df.attrs["source_rows"] = offset
+    return df
@@ -0,0 +1,21 @@
+"""
+Statistics utilities.
+"""
+import math
+
+
+def get_percentiles(values: list, percentiles: tuple = (50, 95, 99)) -> dict:
+    """
+    Get percentiles using the nearest-rank method.
+
+    Args:
+        values (list[float]): values
+        percentiles (tuple[int]): percentiles to compute
+
+    Returns:
+        dict: a dictionary of percentile names, e.g. p95, as keys and percentiles as values
+    """
+    values = sorted(values)
+    if not values:
+        return {f"p{x}": None for x in percentiles}
+    return {f"p{x}": values[max(math.ceil(x / 100 * len(values)) - 1, 0)] for x in percentiles}
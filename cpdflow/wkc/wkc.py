@@ -2,13 +2,19 @@
 Watson Knowledge Catalog APIs.
 """
 
+import atexit
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from cpdflow.wml import wml
 
 _logger = logging.getLogger(__name__)
 
+# facts are exported one at a time as the facts client keeps the current experiment and run
+_facts_executor = ThreadPoolExecutor(max_workers=1)
+atexit.register(_facts_executor.shutdown, wait=True)
+
 
 def get_catalogs(config: dict) -> dict:
     """
@@ -46,13 +52,67 @@ def get_model_entry_details(config: dict, space_type: str) -> dict:
         wml_client.set.default_space(config["dev_space_id"])
     if space_type == "prod":
         wml_client.set.default_space(config["prod_space_id"])
-    model_entry_details = {x["metadata"]["name"]: x for x in wml_client.factsheets.list_model_entries(catalog_id=catalog_id)["results"]}
+    model_entry_details = {x["metadata"]["name"]: x for x in wml_client.factsheets.list_model_entries(catalog_id=catalog_id)["results"] if x}
     return model_entry_details
 
 
+def get_container_id(config: dict, space_type: str) -> str:
+    """
+    Get container id of the project or space.
+
+    Args:
+        config (dict): configuration dictionary
+        space_type (str): project, development or production environment
+
+    Returns:
+        str: project or space id
+    """
+    return {"project": config["project_id"], "dev": config.get("dev_space_id"), "prod": config.get("prod_space_id")}[space_type]
+
+
+def get_model_entry_index(config: dict, space_type: str, refresh: bool = False) -> dict:
+    """
+    Get index of model entries by name and of physical models by model entry name, container id and model name.
+
+    The index is built with a single scan of the model entries in the catalog, kept in ``model_entry_index`` of the configuration dictionary
+    and updated when models are registered or unregistered, so that it is only built once per command.
+    It is cleared by ``clear_model_entry_index`` at the start of each command.
+    An index built again with ``refresh`` is marked as ``refreshed``, so that callers scan the catalog again at most once.
+
+    Args:
+        config (dict): configuration dictionary
+        space_type (str): project, development or production environment
+        refresh (bool): build the index again
+
+    Returns:
+        dict: a dictionary with ``model_entries`` of model entry names as keys and details as values,
+        and ``physical_models`` of (model entry name, container id, model name) as keys and model ids as values
+    """
+    if not refresh and "model_entry_index" in config:
+        return config["model_entry_index"]
+    model_entries = get_model_entry_details(config=config, space_type=space_type)
+    physical_models = {}
+    for model_entry_name, model_entry_details in model_entries.items():
+        for x in model_entry_details.get("entity", {}).get("modelfacts_global", {}).get("physical_models", []):
+            if x["is_deleted"] == False:
+                physical_models[(model_entry_name, x["container_id"], x["name"])] = {"id": x["id"]}
+    config["model_entry_index"] = {"model_entries": model_entries, "physical_models": physical_models, "refreshed": refresh}
+    return config["model_entry_index"]
+
+
+def clear_model_entry_index(config: dict) -> None:
+    """
+    Clear the index of model entries, so that it is built again from the catalog by the next lookup.
+
+    Args:
+        config (dict): configuration dictionary
+    """
+    config.pop("model_entry_index", None)
+
+
 def get_model_entry_details_by_model_entry_name(config: dict, model_entry_name: str, space_type: str) -> dict:
     """
-    Get model entry details by model entry name.
+    Get model entry details by model entry name from ``get_model_entry_index``.
 
     Args:
         config (dict): configuration dictionary
@@ -62,23 +122,16 @@ def get_model_entry_details_by_model_entry_name(config: dict, model_entry_name:
     Returns:
         dict: model entry details
     """
-    wml_client = config["wml_client"]
-    catalog_id = config["catalog_id"]
-    if space_type == "project":
-        wml_client.set.default_project(config["project_id"])
-    if space_type == "dev":
-        wml_client.set.default_space(config["dev_space_id"])
-    if space_type == "prod":
-        wml_client.set.default_space(config["prod_space_id"])
-    for x in wml_client.factsheets.list_model_entries(catalog_id=catalog_id)["results"]:
-        if x and x["metadata"]["name"] == model_entry_name:
-            return x
+    return get_model_entry_index(config=config, space_type=space_type)["model_entries"].get(model_entry_name)
 
 
 def delete_model_from_inventory_by_model_names(config: dict, model_names: list, space_type: str, log_format: str) -> None:
     """
     Delete models from inventory by model names.
 
+    Models are looked up in ``get_model_entry_index``, which is built again if a model is not found and the index has not been refreshed,
+    e.g. a model that was promoted and tracked after the index was built.
+
     Args:
         config (dict): configuration dictionary
         model_names (list[str]): list of model names to be deleted from inventory
@@ -96,14 +149,17 @@ def delete_model_from_inventory_by_model_names(config: dict, model_names: list,
         container_id = config["prod_space_id"]
         wml_client.set.default_space(config["prod_space_id"])
     model_entry_name = config["model_entry_name"]
-    model_entry_details = get_model_entry_details_by_model_entry_name(config=config, model_entry_name=model_entry_name, space_type=space_type)
-    if model_entry_details:
-        models = {x["name"]: x["id"] for x in model_entry_details["entity"]["modelfacts_global"]["physical_models"] if x["container_id"] == container_id and x["is_deleted"] == False}
-        for x in model_names:
-            if x in models:
-                _logger.info(f"{log_format} - deleting ... {x}.")
-                wml_client.factsheets.unregister_model_entry(asset_id=models[x])
-                _logger.info(f"{log_format} - deleted {x}.")
+    model_entry_index = get_model_entry_index(config=config, space_type=space_type)
+    physical_models = model_entry_index["physical_models"]
+    if not model_entry_index["refreshed"] and any((model_entry_name, container_id, x) not in physical_models for x in model_names):
+        physical_models = get_model_entry_index(config=config, space_type=space_type, refresh=True)["physical_models"]
+    for x in model_names:
+        physical_model = physical_models.get((model_entry_name, container_id, x))
+        if physical_model:
+            _logger.info(f"{log_format} - deleting ... {x}.")
+            wml_client.factsheets.unregister_model_entry(asset_id=physical_model["id"])
+            physical_models.pop((model_entry_name, container_id, x))
+            _logger.info(f"{log_format} - deleted {x}.")
     _logger.info(f"{log_format} - delete_model_from_inventory_by_model_names completed.")
 
 
@@ -119,10 +175,33 @@ def delete_model_from_project_inventory_by_model_names(config: dict, model_names
     delete_model_from_inventory_by_model_names(config=config, model_names=model_names, space_type="project", log_format=log_format)
 
 
+def log_facts(facts_client, run_id: str, custom_metrics: dict, custom_params: dict, custom_tags: dict) -> None:
+    """
+    Log custom metrics, params and tags to a run in batches and export the run to Factsheets.
+
+    Args:
+        facts_client: AI governance facts client
+        run_id (str): run id
+        custom_metrics (dict): metric names as keys and metrics as values
+        custom_params (dict): param names as keys and params as values
+        custom_tags (dict): tag names as keys and tags as values
+    """
+    if custom_metrics:
+        facts_client.runs.log_metrics(run_id, custom_metrics)
+    if custom_params:
+        facts_client.runs.log_params(run_id, custom_params)
+    if custom_tags:
+        facts_client.runs.set_tags(run_id, custom_tags)
+    facts_client.export_facts.export_payload(run_id)
+
+
 def export_facts(config: dict, model_config: dict, log_format: str) -> None:
     """
     Export facts to Factsheets.
 
+    The ``custom_metrics``, ``custom_params`` and ``custom_tags`` of the model are logged in batches and exported in the background,
+    so that the model can be packaged in the meantime. ``wait_for_facts`` waits for the export to complete.
+
     Args:
         config (dict): configuration dictionary
         model_config (dict): model configuration
@@ -132,11 +211,32 @@ def export_facts(config: dict, model_config: dict, log_format: str) -> None:
     facts_client = config["facts_client"]
     project_id = config["project_id"]
     wml_client.set.default_project(project_id)
-    custom_metrics = model_config["custom_metrics"]
+    wait_for_facts(model_config=model_config, log_format=log_format)
     run_id = facts_client.runs.get_current_run_id()
-    for key, value in custom_metrics.items():
-        facts_client.runs.log_metric(run_id, key, value)
-    facts_client.export_facts.export_payload(run_id)
+    model_config["facts_future"] = _facts_executor.submit(
+        log_facts,
+        facts_client=facts_client,
+        run_id=run_id,
+        custom_metrics=model_config.get("custom_metrics", {}),
+        custom_params=model_config.get("custom_params", {}),
+        custom_tags=model_config.get("custom_tags", {}),
+    )
+    model_name = model_config["model_name"]
+    _logger.info(f"{log_format} - exporting facts ... {model_name}.")
+
+
+def wait_for_facts(model_config: dict, log_format: str) -> None:
+    """
+    Wait for the facts of the model to be exported by ``export_facts``.
+
+    Args:
+        model_config (dict): model configuration
+        log_format (str): log format for this method
+    """
+    facts_future = model_config.pop("facts_future", None)
+    if facts_future is None:
+        return
+    facts_future.result()
     model_name = model_config["model_name"]
     _logger.info(f"{log_format} - exported_facts completed for {model_name}.")
 
@@ -201,8 +301,12 @@ def register_model(config: dict, model_config: dict, space_type: str, log_format
     if model_entry_details:
         model_entry_asset_id = model_entry_details["metadata"]["asset_id"]
         register_model_existing_entry(config=config, model_uid=model_uid, model_entry_asset_id=model_entry_asset_id, log_format=log_format)
+        model_entry_index = get_model_entry_index(config=config, space_type=space_type)
+        model_entry_index["physical_models"][(model_entry_name, get_container_id(config=config, space_type=space_type), model_name)] = {"id": model_uid}
     else:
         register_model_new_entry(config=config, model_uid=model_uid, model_entry_name=model_entry_name, model_entry_description=model_entry_description, log_format=log_format)
+        # the asset id of the new model entry is only known after the catalog is scanned again
+        config.pop("model_entry_index", None)
     _logger.info(f"{log_format} - register_model completed for {model_name}.")
 
 
@@ -3,12 +3,19 @@ Watson Machine Learning APIs.
 """
 
 from .wml import (
+    get_spec_catalog,
+    get_spec_id,
+    get_software_spec_id,
+    get_hardware_spec_id,
+    get_custom_software_spec,
     get_spaces,
     get_model_deployment_name,
     get_function_deployment_name,
     get_models,
     get_model_details,
+    get_model_fingerprints,
     get_functions,
+    get_function_details,
     get_deployment_details,
     get_deployments,
     check_model_stored,
@@ -18,10 +25,16 @@ from .wml import (
     delete_model_deployment_by_model_deployment_names,
     delete_function_by_function_names,
     delete_function_deployment_by_function_deployment_names,
+    wait_for_models,
+    promote_model_to_spaces,
     promote_model,
     deploy_model,
     update_deployed_model,
     deploy_function,
+    get_scoring_payload_batches,
+    merge_scoring_responses,
+    get_deployment_score,
+    score_model_batches,
     score_model,
 )
 
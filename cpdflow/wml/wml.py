@@ -2,12 +2,25 @@
 Watson Machine Learning APIs.
 """
 
+import json
 import logging
+import os
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cpdflow.utils import cache_utils, stats_utils
 
 _logger = logging.getLogger(__name__)
 
+FINGERPRINT_KEY = "cpdflow_fingerprint"
+
+SPEC_TYPES = ["software_specifications", "hardware_specifications"]
+SPEC_CATALOG_TTL = 24 * 60 * 60
+
+_spec_catalogs = {}
+
 
 def get_spaces(config: dict) -> dict:
     """
@@ -26,6 +39,146 @@ def get_spaces(config: dict) -> dict:
     return spaces
 
 
+def get_spec_catalog(config: dict, spec_type: str, refresh: bool = False) -> dict:
+    """
+    Get software or hardware specifications in the current project or space.
+
+    The catalog is loaded once per process and persisted in the local cache, keyed by the url and the project or space,
+    so that specifications are not listed again for every model. The persisted catalog expires after ``spec_catalog_ttl``
+    seconds in the configuration, one day by default. Set ``refresh`` to reload the catalog.
+
+    Args:
+        config (dict): configuration dictionary
+        spec_type (str): software_specifications or hardware_specifications
+        refresh (bool): reload the catalog
+
+    Returns:
+        dict: a dictionary of specification names as keys and ids as values
+    """
+    wml_client = config["wml_client"]
+    container_id = wml_client.default_space_id or wml_client.default_project_id
+    cache_key = cache_utils.get_hash({"url": config.get("url"), "container_id": container_id, "spec_type": spec_type})
+    cache_file_name = os.path.join(cache_utils.get_cache_dir(config=config, name="specs"), cache_key + ".json")
+    if not refresh and cache_key in _spec_catalogs:
+        return _spec_catalogs[cache_key]
+    if not refresh and os.path.exists(cache_file_name) and time.time() - os.path.getmtime(cache_file_name) < config.get("spec_catalog_ttl", SPEC_CATALOG_TTL):
+        with open(cache_file_name) as f:
+            _spec_catalogs[cache_key] = json.load(f)
+        return _spec_catalogs[cache_key]
+
+    _logger.info(f"SPECS - loading {spec_type} ... {container_id}.")
+    resources = getattr(wml_client, spec_type).get_details()["resources"]
+    _spec_catalogs[cache_key] = {x["metadata"]["name"]: x["metadata"]["asset_id"] for x in resources}
+    tmp_file_name = f"{cache_file_name}.{os.getpid()}.tmp"
+    with open(tmp_file_name, "w") as f:
+        json.dump(_spec_catalogs[cache_key], f, indent=4)
+    os.replace(tmp_file_name, cache_file_name)
+    return _spec_catalogs[cache_key]
+
+
+def get_spec_id(config: dict, spec_type: str, spec_name: str) -> str:
+    """
+    Get id of a software or hardware specification by name.
+
+    The catalog is reloaded once if the specification is not found, e.g. a software specification that was created after the catalog was cached.
+
+    Args:
+        config (dict): configuration dictionary
+        spec_type (str): software_specifications or hardware_specifications
+        spec_name (str): specification name
+
+    Returns:
+        str: specification id
+    """
+    spec_catalog = get_spec_catalog(config=config, spec_type=spec_type)
+    if spec_name not in spec_catalog:
+        spec_catalog = get_spec_catalog(config=config, spec_type=spec_type, refresh=True)
+    if spec_name not in spec_catalog:
+        raise ValueError(f"{spec_name} not found in {spec_type}.")
+    return spec_catalog[spec_name]
+
+
+def get_software_spec_id(config: dict, software_spec: str) -> str:
+    """
+    Get id of a software specification by name, e.g. runtime-22.1-py3.9.
+
+    Args:
+        config (dict): configuration dictionary
+        software_spec (str): software specification name
+
+    Returns:
+        str: software specification id
+    """
+    return get_spec_id(config=config, spec_type="software_specifications", spec_name=software_spec)
+
+
+def get_hardware_spec_id(config: dict, hardware_spec: str) -> str:
+    """
+    Get id of a hardware specification by name, e.g. M.
+
+    Args:
+        config (dict): configuration dictionary
+        hardware_spec (str): hardware specification name
+
+    Returns:
+        str: hardware specification id
+    """
+    return get_spec_id(config=config, spec_type="hardware_specifications", spec_name=hardware_spec)
+
+
+def get_custom_software_spec(config: dict, space_type: str, packages: list, base_software_spec: str = "runtime-22.1-py3.9", log_format: str = "") -> str:
+    """
+    Get custom software specification with additional pip packages in given space, creating it if it does not exist.
+
+    The packages are installed once in a package extension that is added to a software specification based on ``base_software_spec``.
+    The software specification is named with the hash of the packages and the base software specification,
+    so that it is reused by every deployment with the same packages and only created again when they change.
+
+    Args:
+        config (dict): configuration dictionary
+        space_type (str): development or production environment
+        packages (list[str]): pip packages, e.g. category_encoders
+        base_software_spec (str): base software specification name
+        log_format (str): log format for this method
+
+    Returns:
+        str: software specification name
+    """
+    if not packages:
+        return base_software_spec
+    wml_client = config["wml_client"]
+    space_id = config["dev_space_id"] if space_type == "dev" else config["prod_space_id"]
+    wml_client.set.default_space(space_id)
+    software_spec = "cpdflow-" + cache_utils.get_hash({"packages": packages, "base_software_spec": base_software_spec})[:16]
+    if software_spec in get_spec_catalog(config=config, spec_type="software_specifications", refresh=True):
+        _logger.info(f"{log_format} - reusing software specification ... {software_spec}.")
+        return software_spec
+
+    _logger.info(f"{log_format} - creating software specification ... {software_spec} with {packages}.")
+    conda_yml = "\n".join(["name: python", "dependencies:", "  - pip:"] + [f"    - {x}" for x in packages]) + "\n"
+    conda_yml_file_name = os.path.join(cache_utils.get_cache_dir(config=config, name="specs"), software_spec + ".yml")
+    with open(conda_yml_file_name, "w") as f:
+        f.write(conda_yml)
+    meta_props = {
+        wml_client.package_extensions.ConfigurationMetaNames.NAME: software_spec,
+        wml_client.package_extensions.ConfigurationMetaNames.DESCRIPTION: f"cpdflow packages: {', '.join(packages)}",
+        wml_client.package_extensions.ConfigurationMetaNames.TYPE: "conda_yml",
+    }
+    package_extension_details = wml_client.package_extensions.store(meta_props=meta_props, file_path=conda_yml_file_name)
+    package_extension_uid = wml_client.package_extensions.get_uid(package_extension_details)
+    meta_props = {
+        wml_client.software_specifications.ConfigurationMetaNames.NAME: software_spec,
+        wml_client.software_specifications.ConfigurationMetaNames.DESCRIPTION: f"{base_software_spec} with {', '.join(packages)}",
+        wml_client.software_specifications.ConfigurationMetaNames.BASE_SOFTWARE_SPECIFICATION: {"guid": get_software_spec_id(config=config, software_spec=base_software_spec)},
+    }
+    software_spec_details = wml_client.software_specifications.store(meta_props=meta_props)
+    software_spec_uid = wml_client.software_specifications.get_uid(software_spec_details)
+    wml_client.software_specifications.add_package_extension(software_spec_uid, package_extension_uid)
+    get_spec_catalog(config=config, spec_type="software_specifications", refresh=True)
+    _logger.info(f"{log_format} - created software specification {software_spec}.")
+    return software_spec
+
+
 def get_model_deployment_name(model_name: str) -> str:
     """
     Get model deployment name
@@ -96,6 +249,22 @@ def get_model_details(config: dict, space_type: str) -> dict:
     return models
 
 
+def get_model_fingerprints(config: dict, space_type: str) -> dict:
+    """
+    Get fingerprints of all models stored by cpdflow.
+
+    Args:
+        config (dict): configuration dictionary
+        space_type (str): project, development or production environment
+
+    Returns:
+        dict: a dictionary of model names as keys and fingerprints as values
+    """
+    model_details = get_model_details(config=config, space_type=space_type)
+    fingerprints = {k: (v["entity"].get("custom") or {}).get(FINGERPRINT_KEY) for k, v in model_details.items()}
+    return fingerprints
+
+
 def get_functions(config: dict, space_type: str) -> dict:
     """
     Get all functions.
@@ -118,6 +287,26 @@ def get_functions(config: dict, space_type: str) -> dict:
     return models
 
 
+def get_function_details(config: dict, space_type: str) -> dict:
+    """
+    Get all function details.
+
+    Args:
+        config (dict): configuration dictionary
+        space_type (str): development or production environment
+    
+    Returns:
+        dict: a dictionary of function names as keys and function details as values
+    """
+    wml_client = config["wml_client"]
+    if space_type == "dev":
+        wml_client.set.default_space(config["dev_space_id"])
+    if space_type == "prod":
+        wml_client.set.default_space(config["prod_space_id"])
+    details = {x["metadata"]["name"]: x for x in wml_client.repository.get_function_details()["resources"]}
+    return details
+
+
 def get_deployment_details(config: dict, space_type: str) -> dict:
     """
     Get all deployments.
@@ -317,45 +506,119 @@ def delete_function_deployment_by_function_deployment_names(config: dict, functi
             wml_client.deployments.delete(deployments[x])
 
 
-def promote_model(config: dict, model_name: str, space_type: str, log_format: str) -> None:
+def wait_for_models(config: dict, model_name: str, space_types: list, log_format: str, fingerprint: str = None, timeout: int = 300, interval: int = 2) -> None:
+    """
+    Wait for model to be available in the given spaces.
+
+    If ``fingerprint`` is given, the model is only available when a model with the same fingerprint is listed in the space,
+    so that a previous copy of the model with the same name is not taken for the promoted model.
+
+    Args:
+        config (dict): configuration dictionary
+        model_name (str): model name
+        space_types (list[str]): development or production environments
+        log_format (str): log format for this method
+        fingerprint (str): fingerprint of the promoted model
+        timeout (int): maximum number of seconds to wait
+        interval (int): number of seconds between checks
+    """
+    pending = list(space_types)
+    deadline = time.time() + timeout
+    while True:
+        if fingerprint:
+            pending = [x for x in pending if fingerprint not in get_model_fingerprints(config=config, space_type=x).values()]
+        else:
+            pending = [x for x in pending if model_name not in get_models(config=config, space_type=x)]
+        if not pending:
+            return
+        if time.time() > deadline:
+            raise TimeoutError(f"{model_name} is not available in {pending} after {timeout} seconds.")
+        _logger.info(f"{log_format} - waiting for model ... {model_name} in {pending}.")
+        time.sleep(interval)
+
+
+def promote_model_to_spaces(config: dict, model_name: str, space_types: list, log_format: str) -> None:
     """"
-    Promote model in given space.
+    Promote model to the given spaces.
+
+    The model is not promoted again to spaces where the model has the same fingerprint as the model in project space.
+    The model in project space is looked up once, the model is promoted to all spaces concurrently
+    and ``wait_for_models`` waits for a model with the fingerprint of the model in project space to be available in every space.
 
     Args:
         config (dict): configuration dictionary
         model_name (str): model name
-        space_type (str): development or production environment
+        space_types (list[str]): development or production environments
         log_format (str): log format for this method
     """
-    _logger.info(f"{log_format} - promoting model ... {model_name}.")
+    fingerprint = get_model_fingerprints(config=config, space_type="project").get(model_name)
+    promote_space_types = []
+    for space_type in space_types:
+        if fingerprint and get_model_fingerprints(config=config, space_type=space_type).get(model_name) == fingerprint:
+            _logger.info(f"{log_format} - promote_model skipped, {model_name} is unchanged in {space_type}.")
+        else:
+            promote_space_types.append(space_type)
+    if not promote_space_types:
+        return
+    _logger.info(f"{log_format} - promoting model ... {model_name} to {promote_space_types}.")
     wml_client = config["wml_client"]
-    space_id = config["dev_space_id"] if space_type == "dev" else config["prod_space_id"]
     model_uid = get_models(config=config, space_type="project")[model_name]
-    # model_uid = wml.get_model_uid_by_model_name(config=config, model_name=model_name, space_type="project")
     headers = {"Content-Type": "application/json", "Accept": "application/json", "Authorization": wml_client._get_headers()["Authorization"]}
     params = {"project_id": config["project_id"]}
-    data = {"mode": 0, "space_id": space_id}
-    requests.post(f"https://api.dataplatform.cloud.ibm.com/v2/assets/{model_uid}/promote", headers=headers, params=params, json=data)
+
+    def promote(space_type):
+        space_id = config["dev_space_id"] if space_type == "dev" else config["prod_space_id"]
+        data = {"mode": 0, "space_id": space_id}
+        response = requests.post(f"https://api.dataplatform.cloud.ibm.com/v2/assets/{model_uid}/promote", headers=headers, params=params, json=data)
+        response.raise_for_status()
+
+    with ThreadPoolExecutor(max_workers=len(promote_space_types)) as executor:
+        list(executor.map(promote, promote_space_types))
+    wait_for_models(config=config, model_name=model_name, space_types=promote_space_types, log_format=log_format, fingerprint=fingerprint)
     _logger.info(f"{log_format} - promote_model completed for {model_name}.")
 
 
-def deploy_model(config: dict, model_name: str, space_type: str, log_format: str) -> None:
+def promote_model(config: dict, model_name: str, space_type: str, log_format: str) -> None:
+    """"
+    Promote model in given space with ``promote_model_to_spaces``.
+
+    Args:
+        config (dict): configuration dictionary
+        model_name (str): model name
+        space_type (str): development or production environment
+        log_format (str): log format for this method
+    """
+    promote_model_to_spaces(config=config, model_name=model_name, space_types=[space_type], log_format=log_format)
+
+
+def deploy_model(config: dict, model_name: str, space_type: str, log_format: str, model_config: dict = None) -> None:
     """"
     Deploy model in given space.
 
+    The hardware specification of the deployment can be set with ``hardware_spec`` in the model configuration, e.g. S.
+    The model is not deployed again if the deployment already exists in the given space.
+
     Args:
         config (dict): configuration dictionary
         model_name (str): model name
         space_type (str): development or production environment
         log_format (str): log format for this method
+        model_config (dict): model configuration
     """
+    deployment_name = get_model_deployment_name(model_name=model_name)
+    if deployment_name in get_deployments(config=config, space_type=space_type):
+        _logger.info(f"{log_format} - deploy_model skipped, {deployment_name} already exists in {space_type}.")
+        return
     _logger.info(f"{log_format} - deploying model ... {model_name}.")
+    model_config = model_config or {}
     wml_client = config["wml_client"]
     space_id = config["dev_space_id"] if space_type == "dev" else config["prod_space_id"]
     wml_client.set.default_space(space_id)
-    deployment_name = get_model_deployment_name(model_name=model_name)
     model_uid = get_models(config=config, space_type=space_type)[model_name]
     meta_props = {wml_client.deployments.ConfigurationMetaNames.NAME: deployment_name, wml_client.deployments.ConfigurationMetaNames.ONLINE: {}}
+    if model_config.get("hardware_spec"):
+        hardware_spec_id = get_hardware_spec_id(config=config, hardware_spec=model_config["hardware_spec"])
+        meta_props[wml_client.deployments.ConfigurationMetaNames.HARDWARE_SPEC] = {"id": hardware_spec_id}
     wml_client.deployments.create(model_uid, meta_props=meta_props)
     _logger.info(f"{log_format} - deploy_model completed for {model_name}.")
 
@@ -364,6 +627,8 @@ def update_deployed_model(config: dict, model_name: str, space_type: str, log_fo
     """"
     Update model in given space.
 
+    The deployment is not updated if it already serves the model in the given space.
+
     Args:
         config (dict): configuration dictionary
         model_name (str): model name
@@ -377,14 +642,19 @@ def update_deployed_model(config: dict, model_name: str, space_type: str, log_fo
     models = get_models(config=config, space_type=space_type)
     model_uid = models[model_name]
     deployment_name = get_model_deployment_name(model_name=model_name)
-    deployments = get_deployments(config=config, space_type=space_type)
-    deployment_uid = deployments[deployment_name]
+    deployment_details = get_deployment_details(config=config, space_type=space_type)[deployment_name]
+    if deployment_details["entity"].get("asset", {}).get("id") == model_uid:
+        _logger.info(f"{log_format} - update_deployed_model skipped, {deployment_name} already serves {model_name}.")
+        return
+    deployment_uid = deployment_details["metadata"]["id"]
     changes = {wml_client.deployments.ConfigurationMetaNames.ASSET: {"id": model_uid}}
     wml_client.deployments.update(deployment_uid, changes=changes)
     _logger.info(f"{log_format} - updated_deploy_model completed for {model_name}.")
 
 
-def deploy_function(config: dict, function: callable, function_name: str, space_type: str) -> None:
+def deploy_function(
+    config: dict, function: callable, function_name: str, space_type: str, software_spec: str = "runtime-22.1-py3.9", hardware_spec: str = "M", description: str = None
+) -> None:
     """"
     Deploy function in given space.
 
@@ -393,6 +663,9 @@ def deploy_function(config: dict, function: callable, function_name: str, space_
         function (callable): function to be deployed
         function_name (str): function name
         space_type (str): development or production environment
+        software_spec (str): software specification name
+        hardware_spec (str): hardware specification name
+        description (str): description of the function and function deployment
     """
     wml_client = config["wml_client"]
     space_id = config["dev_space_id"] if space_type == "dev" else config["prod_space_id"]
@@ -402,34 +675,158 @@ def deploy_function(config: dict, function: callable, function_name: str, space_
     delete_function_by_function_names(config=config, function_names=[function_name], space_type=space_type, log_format="")
     meta_props = {
         wml_client.repository.FunctionMetaNames.NAME: function_name,
-        wml_client.repository.FunctionMetaNames.SOFTWARE_SPEC_ID: wml_client.software_specifications.get_uid_by_name("runtime-22.1-py3.9"),
+        wml_client.repository.FunctionMetaNames.SOFTWARE_SPEC_ID: get_software_spec_id(config=config, software_spec=software_spec),
     }
+    if description:
+        meta_props[wml_client.repository.FunctionMetaNames.DESCRIPTION] = description
     function_details = wml_client.repository.store_function(function=function, meta_props=meta_props)
     function_uid = wml_client.repository.get_function_id(function_details)
     meta_props = {
         wml_client.deployments.ConfigurationMetaNames.NAME: function_deployment_name,
         wml_client.deployments.ConfigurationMetaNames.ONLINE: {},
-        wml_client.deployments.ConfigurationMetaNames.HARDWARE_SPEC: {"id": wml_client.hardware_specifications.get_id_by_name("M")},
+        wml_client.deployments.ConfigurationMetaNames.HARDWARE_SPEC: {"id": get_hardware_spec_id(config=config, hardware_spec=hardware_spec)},
     }
+    if description:
+        meta_props[wml_client.deployments.ConfigurationMetaNames.DESCRIPTION] = description
     wml_client.deployments.create(function_uid, meta_props=meta_props)
 
 
-def score_model(config: dict, model_name: str, scoring_payload: dict, space_type: str, log_format: str) -> None:
+def get_scoring_payload_batches(scoring_payload: dict, batch_size: int) -> list:
+    """
+    Split scoring payload into batches of rows.
+
+    Args:
+        scoring_payload (dict): scoring payload
+        batch_size (int): number of rows in each batch
+
+    Returns:
+        list[dict]: a list of scoring payloads
+    """
+    input_data = scoring_payload["input_data"][0]
+    batches = []
+    for i in range(0, len(input_data["values"]), batch_size):
+        batch = {"fields": input_data["fields"], "values": input_data["values"][i : i + batch_size]}
+        if "meta" in input_data:
+            batch["meta"] = {"fields": input_data["meta"]["fields"], "values": input_data["meta"]["values"][i : i + batch_size]}
+        batches.append({"input_data": [batch]})
+    return batches
+
+
+def merge_scoring_responses(scoring_responses: list) -> dict:
+    """
+    Merge scoring responses of batches in the original order.
+
+    Args:
+        scoring_responses (list[dict]): scoring responses
+
+    Returns:
+        dict: scoring response, with no values if there are no scoring responses
+    """
+    if not scoring_responses:
+        return {"predictions": [{"fields": [], "values": []}]}
+    predictions = scoring_responses[0]["predictions"][0]
+    values = [x for scoring_response in scoring_responses for x in scoring_response["predictions"][0]["values"]]
+    return {"predictions": [{**predictions, "values": values}]}
+
+
+def get_deployment_score(config: dict, deployment_uid: str) -> callable:
+    """
+    Get function that scores a deployment with HTTP requests, which can be called from worker threads.
+
+    The scoring url and authorization headers are resolved once with ``wml_client``,
+    and each thread sends requests with its own ``requests.Session`` instead of the shared ``wml_client``.
+
+    Args:
+        config (dict): configuration dictionary
+        deployment_uid (str): deployment unique identifier
+
+    Returns:
+        callable: function that scores a scoring payload
+    """
+    wml_client = config["wml_client"]
+    deployment_details = wml_client.deployments.get_details(deployment_uid)
+    scoring_url = wml_client.deployments.get_scoring_href(deployment_details)
+    created_at = deployment_details["metadata"]["created_at"]
+    params = {"version": created_at[0 : created_at.find("T")]}
+    headers = {"Content-Type": "application/json", "Accept": "application/json", "Authorization": wml_client._get_headers()["Authorization"]}
+    local = threading.local()
+
+    def score(scoring_payload):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        response = local.session.post(scoring_url, params=params, headers=headers, json=scoring_payload)
+        response.raise_for_status()
+        return response.json()
+
+    return score
+
+
+def score_model_batches(config: dict, deployment_uid: str, scoring_payload: dict, log_format: str) -> dict:
+    """
+    Score deployment with batches of the scoring payload concurrently with ``get_deployment_score``.
+
+    The number of rows in each batch and the number of requests in flight are set with ``batch_size``
+    and ``max_workers`` in the ``scoring_payload`` configuration.
+
+    Args:
+        config (dict): configuration dictionary
+        deployment_uid (str): deployment unique identifier
+        scoring_payload (dict): scoring payload
+        log_format (str): log format for this method
+
+    Returns:
+        dict: scoring response
+    """
+    batch_size = config["scoring_payload"]["batch_size"]
+    max_workers = config["scoring_payload"].get("max_workers", 4)
+    batches = get_scoring_payload_batches(scoring_payload=scoring_payload, batch_size=batch_size)
+    if not batches:
+        _logger.info(f"{log_format} - scoring payload has no rows.")
+        return merge_scoring_responses([])
+    score_batch = get_deployment_score(config=config, deployment_uid=deployment_uid)
+
+    def score(batch):
+        start = time.perf_counter()
+        scoring_response = score_batch(batch)
+        return scoring_response, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(score, batches))
+    elapsed = time.perf_counter() - start
+
+    num_rows = len(scoring_payload["input_data"][0]["values"])
+    latencies = stats_utils.get_percentiles([x[1] * 1000 for x in results])
+    latencies = ", ".join(f"{k}={v:.0f}ms" for k, v in latencies.items())
+    _logger.info(f"{log_format} - scored {num_rows} rows in {len(batches)} batches, {num_rows / elapsed:.1f} rows/s, {latencies}.")
+    return merge_scoring_responses([x[0] for x in results])
+
+
+def score_model(config: dict, model_name: str, scoring_payload: dict, space_type: str, log_format: str) -> dict:
     """"
     Score model in given space with scoring payload
 
+    The scoring payload is sent in batches when ``batch_size`` is set in the ``scoring_payload`` configuration.
+
     Args:
         config (dict): configuration dictionary
         model_name (str): model name
         scoring_payload (dict): scoring payload
         space_type (str): development or production environment
         log_format (str): log format for this method
+
+    Returns:
+        dict: scoring response
     """
     _logger.info(f"{log_format} - scoring model ... {model_name}.")
     wml_client = config["wml_client"]
     deployment_name = get_model_deployment_name(model_name=model_name)
     model_deployments = get_deployments(config=config, space_type=space_type)
     deployment_uid = model_deployments[deployment_name]
-    wml_client.deployments.score(deployment_uid, scoring_payload)
+    if config.get("scoring_payload", {}).get("batch_size"):
+        scoring_response = score_model_batches(config=config, deployment_uid=deployment_uid, scoring_payload=scoring_payload, log_format=log_format)
+    else:
+        scoring_response = wml_client.deployments.score(deployment_uid, scoring_payload)
     time.sleep(5)
     _logger.info(f"{log_format} - score_model completed for {model_name}.")
+    return scoring_response
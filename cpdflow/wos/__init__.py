@@ -5,6 +5,7 @@ Watson OpenScale APIs.
 from .wos import (
     create_custom_metric_monitor,
     create_custom_metric_provider,
+    get_custom_metric_definitions,
     create_integrated_system,
     create_monitor,
     delete_custom_metric_monitor_by_custom_monitor_name,
@@ -13,11 +14,16 @@ from .wos import (
     evaluate,
     get_custom_metric_name,
     get_custom_metric_provider_name,
+    get_fingerprint_description,
     get_custom_monitor_function_name,
     get_integrated_systems,
+    get_integrated_system_details,
     get_model_name_from_subscription_name,
     get_monitor_definitions,
+    get_monitor_definition_details,
     get_monitor_instances_by_subscription_name,
+    get_payload_record,
+    get_scoring_id,
     get_service_providers,
     get_subscription_name,
     get_subscriptions,
@@ -2,16 +2,35 @@
 Watson OpenScale APIs.
 """
 
+import inspect
 import json
 import requests
 import logging
 import pandas as pd
 import ibm_watson_openscale
 from cpdflow.wml import wml
+from cpdflow.metrics import metrics as metrics_
+from cpdflow.model import schema
+from cpdflow.utils import cache_utils
 import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ibm_watson_openscale.supporting_classes.payload_record import PayloadRecord
 
 IAM_URL = "https://iam.cloud.ibm.com/identity/token"
 
+TRANSACTION_ID_HEADER = "X-Global-Transaction-Id"
+
+CUSTOM_METRIC_DEFINITIONS = [
+    {"name": "statistical_parity_difference", "thresholds": [{"type": "upper_limit", "default": 0.01}]},
+    {"name": "disparate_impact_ratio", "thresholds": [{"type": "upper_limit", "default": 0.01}]},
+]
+
+CUSTOM_METRIC_TAGS = [{"name": "region", "description": "us-south"}]
+
 _logger = logging.getLogger(__name__)
 
 
@@ -55,6 +74,20 @@ def get_custom_metric_provider_name(custom_monitor_name: str) -> str:
     return custom_monitor_name + " Provider"
 
 
+def get_fingerprint_description(name: str, fingerprint: str) -> str:
+    """
+    Get description of a custom metric resource with its fingerprint, e.g. ``Custom Metrics Provider [cpdflow:<fingerprint>]``.
+
+    Args:
+        name (str): resource name
+        fingerprint (str): fingerprint of the resource definition
+
+    Returns:
+        str: description
+    """
+    return f"{name} [cpdflow:{fingerprint}]"
+
+
 def get_custom_metric_name(custom_monitor_name: str) -> str:
     """
     Get custom metric name
@@ -131,6 +164,25 @@ def get_integrated_systems(config: dict) -> dict:
     return integrated_systems
 
 
+def get_integrated_system_details(config: dict) -> dict:
+    """
+    Get all integrated system details.
+
+    Args:
+        config (dict): configuration dictionary
+    
+    Returns:
+        dict: a dictionary of integrated_system names as keys and integrated system details as values
+    """
+    wos_client = config["wos_client"]
+    integrated_systems = {
+        x["entity"]["name"]: x
+        for x in ibm_watson_openscale.base_classes.watson_open_scale_v2.IntegratedSystems(wos_client).list().result.to_dict()["integrated_systems"]
+        if x["entity"]["type"] == "custom_metrics_provider"
+    }
+    return integrated_systems
+
+
 def get_monitor_definitions(config: dict) -> dict:
     """
     Get all monitor definitions.
@@ -146,6 +198,21 @@ def get_monitor_definitions(config: dict) -> dict:
     return monitor_definitions
 
 
+def get_monitor_definition_details(config: dict) -> dict:
+    """
+    Get all monitor definition details.
+
+    Args:
+        config (dict): configuration dictionary
+    
+    Returns:
+        dict: a dictionary of monitor definition names as keys and monitor definition details as values
+    """
+    wos_client = config["wos_client"]
+    monitor_definitions = {x["entity"]["name"]: x for x in wos_client.monitor_definitions.list().result.to_dict()["monitor_definitions"]}
+    return monitor_definitions
+
+
 def get_monitor_instances_by_subscription_name(config: dict, model_name: str, space_type: str) -> dict:
     """
     Get all monitor instances by subscription name.
@@ -193,87 +260,206 @@ def create_custom_metric_provider(config: dict, space_type: str) -> None:
     """
     Create custom metric provider.
 
+    The pip packages required by the custom metric script are listed in ``packages`` of the ``custom_metric`` section and installed
+    once in a custom software specification, so that the provider function does not install them when it starts.
+
+    The source of ``cpdflow.metrics`` is shipped with the function and always loaded as the ``cpdflow_metrics`` module, so that custom metric scripts
+    can compute fairness metrics without additional packages, even if another version of cpdflow is installed in the runtime.
+    Metrics that are None, e.g. when a group has no records, are not published.
+
+    Feedback records are read in pages of ``page_size`` records. If the custom metric script defines ``accumulate(df, state)`` and
+    ``finalize(state)``, only records added since the last run are read and accumulated into a state that is kept with the
+    latest record timestamp in the monitor instance parameters. Records are read from ``overlap_seconds`` before the latest record timestamp,
+    so that late records are not skipped, and the records seen in the overlap are kept by id or row hash so that they are not accumulated twice.
+    At most about ``max_overlap_records`` records are kept, and the overlap starts at the oldest record kept if there are more records in the overlap.
+    Feedback records must have a ``record_timestamp`` column. Otherwise, ``calculate_metrics(df)`` is called with all records.
+
+    The published metrics are kept in the monitor instance parameters with a hash of the custom metric script, the source of ``cpdflow_metrics``,
+    the modified time of the feedback data set, the number of feedback records and the latest feedback record.
+    If the hash is unchanged in the next run, the feedback records are not read and the last metrics are published with the new timestamp.
+
+    The function is fingerprinted by the custom metric script, the provider source, packages, specifications and page size.
+    The fingerprint is kept in the function description, and the function is only redeployed when the fingerprint changes.
+
     Args:
         config (dict): configuration dictionary
         space_type (dict): development or production environment
     """
+    log_format = f"SUBSCRIBE - {'CUSTOM METRIC':<15} - create_custom_metric_provider"
     with open(config["custom_metric"]["custom_metric_script"]) as f:
         calculate_metrics = f.read()
 
-    params = {"apikey": config["apikey"], "calculate_metrics": calculate_metrics}
+    with open(metrics_.__file__) as f:
+        metrics_source = f.read()
+
+    params = {"apikey": config["apikey"], "calculate_metrics": calculate_metrics, "metrics_source": metrics_source, "page_size": config["custom_metric"].get("page_size", 1000), "overlap_seconds": config["custom_metric"].get("overlap_seconds", 3600), "max_overlap_records": config["custom_metric"].get("max_overlap_records", 10000)}
 
     def custom_metrics_provider(params=params):
         WOS_URL = "https://api.aiopenscale.cloud.ibm.com"
 
         import datetime
+        import hashlib
+        import json
+        import sys
+        import threading
+        import time
+        import types
         import requests
         import pandas as pd
 
-        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        session = requests.Session()
+        token = {"access_token": None, "expiration": 0}
+        token_lock = threading.Lock()
 
-        import subprocess
+        cpdflow_metrics = types.ModuleType("cpdflow_metrics")
+        exec(compile(params["metrics_source"], "cpdflow_metrics.py", "exec"), cpdflow_metrics.__dict__)
+        sys.modules["cpdflow_metrics"] = cpdflow_metrics
 
-        packages = ["aif360[all]", "category_encoders"]
-        subprocess.run(["pip", "install"] + packages + ["--user", "--no-cache-dir"], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
-
-        with open("custom_metric.py", "w") as f:
-            f.write(params["calculate_metrics"])
+        custom_metric = types.ModuleType("custom_metric")
+        exec(compile(params["calculate_metrics"], "custom_metric.py", "exec"), custom_metric.__dict__)
 
         def get_access_token():
-            headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
-            data = {"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": params["apikey"]}
-            access_token = requests.post("https://iam.cloud.ibm.com/identity/token", data=data, headers=headers).json()["access_token"]
-            return access_token
-
-        def get_feedback_dataset_id(access_token, data_mart_id, subscription_id):
-            headers["Authorization"] = "Bearer " + access_token
+            with token_lock:
+                if token["access_token"] is None or time.time() > token["expiration"] - 300:
+                    headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
+                    data = {"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": params["apikey"]}
+                    response = session.post("https://iam.cloud.ibm.com/identity/token", data=data, headers=headers)
+                    response.raise_for_status()
+                    json_data = response.json()
+                    token["access_token"] = json_data["access_token"]
+                    token["expiration"] = json_data.get("expiration", time.time() + json_data.get("expires_in", 3600))
+                return token["access_token"]
+
+        def get_headers(access_token):
+            return {"Content-Type": "application/json", "Accept": "application/json", "Authorization": "Bearer " + access_token}
+
+        def get_feedback_dataset(access_token, data_mart_id, subscription_id):
             DATASETS_URL = f"{WOS_URL}/openscale/{data_mart_id}/v2/data_sets?target.target_id={subscription_id}&target.target_type=subscription&type=feedback"
-            json_data = requests.get(DATASETS_URL, headers=headers).json()
-            feedback_dataset_id = None
+            json_data = session.get(DATASETS_URL, headers=get_headers(access_token)).json()
+            feedback_dataset_id, modified_at = None, None
             if "data_sets" in json_data and len(json_data["data_sets"]) > 0:
                 feedback_dataset_id = json_data["data_sets"][0]["metadata"]["id"]
-            return feedback_dataset_id
-
-        def get_feedback_data(access_token, data_mart_id, feedback_dataset_id):
-            json_data = None
-            num_records = 100
-            if feedback_dataset_id is not None:
-                headers["Authorization"] = "Bearer " + access_token
-                DATASETS_STORE_RECORDS_URL = f"{WOS_URL}/openscale/{data_mart_id}/v2/data_sets/{feedback_dataset_id}/records?limit={num_records}&format=list"
-                json_data = requests.get(DATASETS_STORE_RECORDS_URL, headers=headers, verify=False).json()
-                return json_data
+                modified_at = json_data["data_sets"][0]["metadata"].get("modified_at")
+            return feedback_dataset_id, modified_at
+
+        def get_feedback_data(access_token, data_mart_id, feedback_dataset_id, start=None, end=None):
+            if feedback_dataset_id is None:
+                return
+            DATASETS_STORE_RECORDS_URL = f"{WOS_URL}/openscale/{data_mart_id}/v2/data_sets/{feedback_dataset_id}/records"
+            page_size = params["page_size"]
+            offset = 0
+            while True:
+                query = {"limit": page_size, "offset": offset, "format": "list"}
+                if start:
+                    query["start"] = start
+                if end:
+                    query["end"] = end
+                json_data = session.get(DATASETS_STORE_RECORDS_URL, headers=get_headers(access_token), params=query, verify=False).json()
+                records = json_data.get("records") or [{"fields": [], "values": []}]
+                values = records[0]["values"]
+                if values:
+                    yield pd.DataFrame(values, columns=records[0]["fields"])
+                if len(values) < page_size:
+                    return
+                offset += page_size
+
+        def get_feedback_summary(access_token, data_mart_id, feedback_dataset_id, end=None):
+            if feedback_dataset_id is None:
+                return None
+            DATASETS_STORE_RECORDS_URL = f"{WOS_URL}/openscale/{data_mart_id}/v2/data_sets/{feedback_dataset_id}/records"
+            query = {"limit": 1, "offset": 0, "format": "list", "include_total_count": "true"}
+            if end:
+                query["end"] = end
+            json_data = session.get(DATASETS_STORE_RECORDS_URL, headers=get_headers(access_token), params=query, verify=False).json()
+            if json_data.get("total_count") is None:
+                return None
+            # the latest record changes when records are added or replaced, even if the number of records is unchanged
+            records = json_data.get("records") or [{"fields": [], "values": []}]
+            return {"total_count": json_data["total_count"], "latest_record": records[0]["values"][:1]}
+
+        def get_feedback_hash(feedback_dataset_id, modified_at, feedback_summary):
+            if feedback_summary is None:
+                return None
+            value = {
+                "calculate_metrics": params["calculate_metrics"],
+                "metrics_source": params["metrics_source"],
+                "feedback_dataset_id": feedback_dataset_id,
+                "modified_at": modified_at,
+                "feedback_summary": feedback_summary,
+            }
+            return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
         def update_monitor_instance(base_url, access_token, custom_monitor_instance_id, payload):
             monitor_instance_url = f"{base_url}/v2/monitor_instances/{custom_monitor_instance_id}?update_metadata_only=true"
             patch_payload = [{"op": "replace", "path": "/parameters", "value": payload}]
-            headers["Authorization"] = "Bearer " + access_token
-            response = requests.patch(monitor_instance_url, headers=headers, json=patch_payload, verify=False)
+            response = session.patch(monitor_instance_url, headers=get_headers(access_token), json=patch_payload, verify=False)
             monitor_response = response.json()
             return response.status_code, monitor_response
 
-        def get_metrics(access_token, data_mart_id, subscription_id):
-            import custom_metric
-
-            feedback_dataset_id = get_feedback_dataset_id(access_token, data_mart_id, subscription_id)
-            json_data = get_feedback_data(access_token, data_mart_id, feedback_dataset_id)
-
-            fields = json_data["records"][0]["fields"]
-            values = json_data["records"][0]["values"]
-
-            df = pd.DataFrame(values, columns=fields)
-
-            metrics = custom_metric.calculate_metrics(df=df)
-
-            return metrics
-
-        def publish_metrics(base_url, access_token, data_mart_id, subscription_id, custom_monitor_id, custom_monitor_instance_id, custom_monitoring_run_id, timestamp):
-            custom_metrics = get_metrics(access_token, data_mart_id, subscription_id)
+        def get_metrics(access_token, data_mart_id, subscription_id, custom_monitor_instance_params, timestamp):
+            feedback_dataset_id, modified_at = get_feedback_dataset(access_token, data_mart_id, subscription_id)
+
+            feedback_summary = get_feedback_summary(access_token, data_mart_id, feedback_dataset_id, end=timestamp)
+            feedback_hash = get_feedback_hash(feedback_dataset_id, modified_at, feedback_summary)
+            if feedback_hash is not None and feedback_hash == custom_monitor_instance_params.get("feedback_hash") and custom_monitor_instance_params.get("last_metrics"):
+                return custom_monitor_instance_params["last_metrics"], {}
+
+            if not hasattr(custom_metric, "accumulate"):
+                dfs = list(get_feedback_data(access_token, data_mart_id, feedback_dataset_id, end=timestamp))
+                if not dfs:
+                    raise ValueError("No feedback records found.")
+                custom_metrics = custom_metric.calculate_metrics(df=pd.concat(dfs, ignore_index=True))
+                return custom_metrics, {"feedback_hash": feedback_hash, "last_metrics": custom_metrics}
+
+            overlap = pd.Timedelta(seconds=params["overlap_seconds"])
+            last_record_timestamp = custom_monitor_instance_params.get("last_record_timestamp")
+            recent_records = custom_monitor_instance_params.get("recent_records") or {}
+            start = custom_monitor_instance_params.get("overlap_start")
+            state = custom_monitor_instance_params.get("metric_state") or {}
+            occurrences = {}
+            for df in get_feedback_data(access_token, data_mart_id, feedback_dataset_id, start=start, end=timestamp):
+                # records without an id are identified by the hash of their values, including the record timestamp, and their occurrence in the records read
+                record_ids = []
+                for x in df["record_id"].astype(str) if "record_id" in df.columns else pd.util.hash_pandas_object(df.astype(str), index=False).astype(str):
+                    record_ids.append(f"{x}:{occurrences.get(x, 0)}")
+                    occurrences[x] = occurrences.get(x, 0) + 1
+                record_ids = pd.Series(record_ids, index=df.index)
+                # without record timestamps, the records read in the next run are not known and would be accumulated again
+                if "record_timestamp" not in df.columns:
+                    raise ValueError("Feedback records have no record_timestamp column, which is required to accumulate metrics. Define only calculate_metrics(df) instead.")
+                is_new = ~record_ids.isin(recent_records)
+                df, record_ids = df[is_new], record_ids[is_new]
+                if df.empty:
+                    continue
+                record_timestamps = pd.to_datetime(df["record_timestamp"], utc=True).dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                recent_records.update(zip(record_ids, record_timestamps))
+                last_record_timestamp = max([last_record_timestamp or "", record_timestamps.max()])
+                state = custom_metric.accumulate(df=df, state=state)
+            if not state:
+                raise ValueError("No feedback records found.")
+
+            overlap_start = start
+            if last_record_timestamp:
+                overlap_start = (pd.to_datetime(last_record_timestamp, utc=True) - overlap).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                if len(recent_records) > params["max_overlap_records"]:
+                    # records with the same timestamp are kept together, as the next run reads every record from the start of the overlap
+                    overlap_start = max(overlap_start, sorted(recent_records.values(), reverse=True)[params["max_overlap_records"] - 1])
+                recent_records = {k: v for k, v in recent_records.items() if v >= overlap_start}
+            custom_metrics = custom_metric.finalize(state=state)
+            updates = {"last_record_timestamp": last_record_timestamp, "overlap_start": overlap_start, "recent_records": recent_records, "metric_state": state}
+            return custom_metrics, {**updates, "feedback_hash": feedback_hash, "last_metrics": custom_metrics}
+
+        def publish_metrics(base_url, access_token, data_mart_id, subscription_id, custom_monitor_id, custom_monitor_instance_id, custom_monitor_instance_params, custom_monitoring_run_id, timestamp):
+            custom_metrics, updates = get_metrics(access_token, data_mart_id, subscription_id, custom_monitor_instance_params, timestamp)
+            # metrics that cannot be computed are None or nan, which is not valid JSON
+            custom_metrics = {k: v for k, v in custom_metrics.items() if v is not None and v == v}
+            if "last_metrics" in updates:
+                updates["last_metrics"] = custom_metrics
             measurements_payload = [{"timestamp": timestamp, "run_id": custom_monitoring_run_id, "metrics": [custom_metrics]}]
-            headers["Authorization"] = "Bearer {}".format(access_token)
             measurements_url = f"{base_url}/v2/monitor_instances/{custom_monitor_instance_id}/measurements"
-            response = requests.post(measurements_url, headers=headers, json=measurements_payload)
+            response = session.post(measurements_url, headers=get_headers(access_token), json=measurements_payload)
             published_measurement = response.json()
-            return response.status_code, published_measurement
+            return response.status_code, published_measurement, updates
 
         def publish(input_data):
             timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
@@ -293,11 +479,12 @@ def create_custom_metric_provider(config: dict, space_type: str) -> None:
             custom_monitoring_run_id = custom_monitor_instance_params["run_details"]["run_id"]
 
             try:
-                status_code, published_measurement = publish_metrics(
-                    base_url, access_token, data_mart_id, subscription_id, custom_monitor_id, custom_monitor_instance_id, custom_monitoring_run_id, timestamp
+                status_code, published_measurement, updates = publish_metrics(
+                    base_url, access_token, data_mart_id, subscription_id, custom_monitor_id, custom_monitor_instance_id, custom_monitor_instance_params, custom_monitoring_run_id, timestamp
                 )
                 if int(status_code) in [200, 201, 202]:
                     custom_monitor_instance_params["run_details"]["run_status"] = "finished"
+                    custom_monitor_instance_params.update(updates)
                     published_measurements.append(published_measurement)
                 else:
                     custom_monitor_instance_params["run_details"]["run_status"] = "error"
@@ -324,8 +511,43 @@ def create_custom_metric_provider(config: dict, space_type: str) -> None:
         return publish
 
     custom_metric_function_name = get_custom_monitor_function_name(custom_monitor_name=config["custom_metric"]["custom_monitor_name"])
+    packages = config["custom_metric"].get("packages", [])
+    base_software_spec = config["custom_metric"].get("software_spec", "runtime-22.1-py3.9")
+    hardware_spec = config["custom_metric"].get("hardware_spec", "M")
+
+    fingerprint = cache_utils.get_hash(
+        {
+            "params": params,
+            "provider_source": inspect.getsource(custom_metrics_provider),
+            "packages": packages,
+            "software_spec": base_software_spec,
+            "hardware_spec": hardware_spec,
+        }
+    )
+    description = get_fingerprint_description(name=custom_metric_function_name, fingerprint=fingerprint)
+    function_details = wml.get_function_details(config=config, space_type=space_type)
+    deployments = wml.get_deployments(config=config, space_type=space_type)
+    if (
+        function_details.get(custom_metric_function_name, {}).get("metadata", {}).get("description") == description
+        and wml.get_function_deployment_name(function_name=custom_metric_function_name) in deployments
+    ):
+        _logger.info(f"{log_format} - function is unchanged, skipping ... {custom_metric_function_name}.")
+        return
+
+    software_spec = wml.get_custom_software_spec(
+        config=config, space_type=space_type, packages=packages, base_software_spec=base_software_spec, log_format=log_format,
+    )
 
-    wml.deploy_function(config=config, function=custom_metrics_provider, function_name=custom_metric_function_name, space_type=space_type)
+    _logger.info(f"{log_format} - deploying function ... {custom_metric_function_name}.")
+    wml.deploy_function(
+        config=config,
+        function=custom_metrics_provider,
+        function_name=custom_metric_function_name,
+        space_type=space_type,
+        software_spec=software_spec,
+        hardware_spec=hardware_spec,
+        description=description,
+    )
 
 
 def delete_integrated_system_by_custom_monitor_name(config: dict, log_format: str) -> None:
@@ -370,10 +592,14 @@ def create_integrated_system(config: dict, space_type: str) -> None:
     """
     Create integrated system.
 
+    The integrated system is fingerprinted by the scoring url of the custom metrics provider function and the credentials,
+    and is only recreated when the fingerprint changes, e.g. after the function is redeployed.
+
     Args:
         config (dict): configuration dictionary
         space_type (dict): development or production environment
     """
+    log_format = f"SUBSCRIBE - {'CUSTOM METRIC':<15} - create_integrated_system"
     wos_client = config["wos_client"]
     wml_client = config["wml_client"]
     custom_monitor_name = config["custom_metric"]["custom_monitor_name"]
@@ -389,10 +615,6 @@ def create_integrated_system(config: dict, space_type: str) -> None:
         },
     }
 
-    integrated_systems = get_integrated_systems(config=config)
-    if custom_metric_provider_name in integrated_systems:
-        ibm_watson_openscale.base_classes.watson_open_scale_v2.IntegratedSystems(wos_client).delete(integrated_system_id=integrated_systems[custom_metric_provider_name], background_mode=False)
-
     deployments = wml.get_deployment_details(config=config, space_type=space_type)
     custom_monitor_function_name = get_custom_monitor_function_name(custom_monitor_name=custom_monitor_name)
     function_deployment_name = wml.get_function_deployment_name(function_name=custom_monitor_function_name)
@@ -403,53 +625,81 @@ def create_integrated_system(config: dict, space_type: str) -> None:
     current_date = created_at[0 : created_at.find("T")]
     scoring_url = wml_client.deployments.get_scoring_href(function_deployment_details) + "?version=" + current_date
 
+    fingerprint = cache_utils.get_hash({"scoring_url": scoring_url, "credentials": CUSTOM_METRICS_PROVIDER_CREDENTIALS})
+    description = get_fingerprint_description(name=custom_metric_provider_name, fingerprint=fingerprint)
+    integrated_systems = get_integrated_system_details(config=config)
+    if custom_metric_provider_name in integrated_systems:
+        if integrated_systems[custom_metric_provider_name]["entity"].get("description") == description:
+            _logger.info(f"{log_format} - integrated system is unchanged, skipping ... {custom_metric_provider_name}.")
+            return
+        _logger.info(f"{log_format} - deleting integrated system ... {custom_metric_provider_name}.")
+        ibm_watson_openscale.base_classes.watson_open_scale_v2.IntegratedSystems(wos_client).delete(
+            integrated_system_id=integrated_systems[custom_metric_provider_name]["metadata"]["id"], background_mode=False
+        )
+
+    _logger.info(f"{log_format} - creating integrated system ... {custom_metric_provider_name}.")
     ibm_watson_openscale.base_classes.watson_open_scale_v2.IntegratedSystems(wos_client).add(
         name=custom_metric_provider_name,
-        description=custom_metric_provider_name,
+        description=description,
         type="custom_metrics_provider",
         credentials=CUSTOM_METRICS_PROVIDER_CREDENTIALS,
         connection={"display_name": custom_metric_provider_name, "endpoint": scoring_url},
     )
 
 
+def get_custom_metric_definitions(config: dict) -> tuple:
+    """
+    Get metric and tag definitions of the custom monitor.
+
+    Metrics and tags are set with ``metrics`` and ``tags`` in the ``custom_metric`` section, e.g.
+    ``{"name": "disparate_impact_ratio", "thresholds": [{"type": "lower_limit", "default": 0.8}]}`` and ``{"name": "region", "description": "us-south"}``.
+    Defaults to statistical parity difference and disparate impact ratio, and a region tag.
+
+    Args:
+        config (dict): configuration dictionary
+
+    Returns:
+        tuple: a list of metric definitions and a list of tag definitions
+    """
+    metric_definitions = config["custom_metric"].get("metrics", CUSTOM_METRIC_DEFINITIONS)
+    tags = config["custom_metric"].get("tags", CUSTOM_METRIC_TAGS)
+    return metric_definitions, tags
+
+
 def create_custom_metric_monitor(config: dict) -> None:
     """
-    Create custom metric monitor.
+    Create custom metric monitor with the metric and tag definitions from ``get_custom_metric_definitions``.
+
+    The monitor definition is fingerprinted by the metric and tag definitions, including thresholds,
+    and is only recreated when the fingerprint changes.
 
     Args:
         config (dict): configuration dictionary
     """
+    log_format = f"SUBSCRIBE - {'CUSTOM METRIC':<15} - create_custom_metric_monitor"
     wos_client = config["wos_client"]
     custom_monitor_name = config["custom_metric"]["custom_monitor_name"]
+    metric_definitions, tags = get_custom_metric_definitions(config=config)
+    fingerprint = cache_utils.get_hash({"metrics": metric_definitions, "tags": tags})
+    description = get_fingerprint_description(name=custom_monitor_name, fingerprint=fingerprint)
+    monitor_definitions = get_monitor_definition_details(config=config)
+    if custom_monitor_name in monitor_definitions:
+        if monitor_definitions[custom_monitor_name]["entity"].get("description") == description:
+            _logger.info(f"{log_format} - monitor definition is unchanged, skipping ... {custom_monitor_name}.")
+            return
+        _logger.info(f"{log_format} - deleting monitor definition ... {custom_monitor_name}.")
+        wos_client.monitor_definitions.delete(monitor_definitions[custom_monitor_name]["metadata"]["id"], background_mode=False)
+
     metrics = [
         ibm_watson_openscale.base_classes.watson_open_scale_v2.MonitorMetricRequest(
-            name="statistical_parity_difference",
-            thresholds=[ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=ibm_watson_openscale.supporting_classes.enums.MetricThresholdTypes.UPPER_LIMIT, default=0.01)],
-        ),
-        ibm_watson_openscale.base_classes.watson_open_scale_v2.MonitorMetricRequest(
-            name="disparate_impact_ratio",
-            thresholds=[ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=ibm_watson_openscale.supporting_classes.enums.MetricThresholdTypes.UPPER_LIMIT, default=0.01)],
-        ),
-        # ibm_watson_openscale.base_classes.watson_open_scale_v2.MonitorMetricRequest(
-        #     name="specificity",
-        #     thresholds=[
-        #         ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=ibm_watson_openscale.supporting_classes.enums.MetricThresholdTypes.LOWER_LIMIT, default=0.6),
-        #         ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=ibm_watson_openscale.supporting_classes.enums.MetricThresholdTypes.UPPER_LIMIT, default=1),
-        #     ],
-        # ),
-        # ibm_watson_openscale.base_classes.watson_open_scale_v2.MonitorMetricRequest(
-        #     name="sensitivity",
-        #     thresholds=[
-        #         ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=ibm_watson_openscale.supporting_classes.enums.MetricThresholdTypes.LOWER_LIMIT, default=0.4),
-        #         ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=ibm_watson_openscale.supporting_classes.enums.MetricThresholdTypes.UPPER_LIMIT, default=1),
-        #     ],
-        # ),
+            name=x["name"],
+            thresholds=[ibm_watson_openscale.base_classes.watson_open_scale_v2.MetricThreshold(type=y["type"], default=y["default"]) for y in x.get("thresholds", [])],
+        )
+        for x in metric_definitions
     ]
-    tags = [ibm_watson_openscale.base_classes.watson_open_scale_v2.MonitorTagRequest(name="region", description="us-south")]
-    monitor_definitions = get_monitor_definitions(config=config)
-    if custom_monitor_name in monitor_definitions:
-        wos_client.monitor_definitions.delete(monitor_definitions[custom_monitor_name], background_mode=False)
-    wos_client.monitor_definitions.add(name=custom_monitor_name, metrics=metrics, tags=tags, background_mode=False)
+    tags = [ibm_watson_openscale.base_classes.watson_open_scale_v2.MonitorTagRequest(name=x["name"], description=x.get("description", "")) for x in tags]
+    _logger.info(f"{log_format} - creating monitor definition ... {custom_monitor_name}.")
+    wos_client.monitor_definitions.add(name=custom_monitor_name, metrics=metrics, tags=tags, description=description, background_mode=False)
 
 
 def subscribe_custom_model(config: dict, model_config: dict, space_type: str, log_format: str) -> None:
@@ -504,11 +754,11 @@ def subscribe_custom_model(config: dict, model_config: dict, space_type: str, lo
 
     feature_columns = [x["name"] for x in input_data_schema]
 
-    cat_features = [x["name"] for x in input_data_schema if x["type"] == "object"]
+    cat_features = [x["name"] for x in input_data_schema if schema.get_spark_type(x["type"]) == "string"]
 
     training_data_schema = {
         "type": "struct",
-        "fields": [{"name": x["name"], "type": "string" if x["type"] == "object" else "long", "nullable": True} for x in input_data_schema],
+        "fields": [{"name": x["name"], "type": schema.get_spark_type(x["type"]), "nullable": True} for x in input_data_schema],
         "id": "1",
     }
 
@@ -748,10 +998,59 @@ def store_feedback(config: dict, model_name: str, feedback_payload: pd.DataFrame
     _logger.info(f"{log_format} - store_feedback completed for {model_name}.")
 
 
+def get_scoring_id(response: requests.Response, request_id: str) -> str:
+    """
+    Get scoring id returned by the scoring endpoint.
+
+    The scoring id is taken from ``scoring_id`` in the response body or from the ``X-Global-Transaction-Id`` header
+    of the response, otherwise the request id sent to the scoring endpoint is used.
+
+    Args:
+        response (requests.Response): scoring response
+        request_id (str): request id sent to the scoring endpoint
+
+    Returns:
+        str: scoring id
+    """
+    try:
+        scoring_response = response.json()
+    except ValueError:
+        scoring_response = None
+    if isinstance(scoring_response, dict) and scoring_response.get("scoring_id"):
+        return str(scoring_response["scoring_id"])
+    if response.headers.get(TRANSACTION_ID_HEADER):
+        return response.headers[TRANSACTION_ID_HEADER]
+    return request_id
+
+
+def get_payload_record(scoring_url: str, scoring_payload: dict) -> "PayloadRecord":
+    """
+    Score custom model and get payload record with the measured response time.
+
+    Args:
+        scoring_url (str): scoring url
+        scoring_payload (dict): scoring payload with fields and values
+
+    Returns:
+        PayloadRecord: payload record
+    """
+    request_id = str(uuid.uuid4())
+    headers = {"Content-Type": "application/json", "X-Request-ID": request_id}
+    start = time.monotonic()
+    r = requests.post(scoring_url, data=json.dumps(scoring_payload), headers=headers, verify=False)
+    response_time = int((time.monotonic() - start) * 1000)
+    scoring_response = r.json()
+    scoring_id = get_scoring_id(response=r, request_id=request_id)
+    return ibm_watson_openscale.supporting_classes.payload_record.PayloadRecord(scoring_id=scoring_id, request=scoring_payload, response=scoring_response, response_time=response_time)
+
+
 def store_payload(config: dict, model_config: dict, scoring_payload: pd.DataFrame, space_type: str, log_format: str):
     """
     Store payload data.
 
+    The custom model is scored with the scoring payload and the response time of each scoring request is recorded.
+    The scoring payload is sent in batches when ``batch_size`` is set in the ``scoring_payload`` configuration.
+
     Args:
         config (dict): configuration dictionary
         model_config (dict): model configuraton
@@ -767,7 +1066,6 @@ def store_payload(config: dict, model_config: dict, scoring_payload: pd.DataFram
     subscription_id = subscriptions[subscription_name]
     wos_client = config["wos_client"]
     scoring_url = model_config["scoring_url"]
-    scoring_payload = scoring_payload["input_data"][0]
     payload_data_set_id = (
         wos_client.data_sets.list(
             type=ibm_watson_openscale.supporting_classes.enums.DataSetTypes.PAYLOAD_LOGGING,
@@ -778,13 +1076,19 @@ def store_payload(config: dict, model_config: dict, scoring_payload: pd.DataFram
         .metadata.id
     )
 
-    headers = {"Content-Type": "application/json"}
-    r = requests.post(scoring_url, data=json.dumps(scoring_payload), headers=headers, verify=False)
-    scoring_response = r.json()
+    batch_size = config.get("scoring_payload", {}).get("batch_size")
+    max_workers = config.get("scoring_payload", {}).get("max_workers", 4)
+    if batch_size:
+        scoring_payloads = [x["input_data"][0] for x in wml.get_scoring_payload_batches(scoring_payload=scoring_payload, batch_size=batch_size)]
+    else:
+        scoring_payloads = [scoring_payload["input_data"][0]]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        payload_records = list(executor.map(lambda x: get_payload_record(scoring_url=scoring_url, scoring_payload=x), scoring_payloads))
 
-    payload_records = [ibm_watson_openscale.supporting_classes.payload_record.PayloadRecord(scoring_id=str(uuid.uuid4()), request=scoring_payload, response=scoring_response, response_time=int(460))]
     wos_client.data_sets.store_records(data_set_id=payload_data_set_id, request_body=payload_records, background_mode=False)
-    _logger.info(f"{log_format} - stored {len(scoring_payload['values'])} records for {model_name}.")
+    response_times = ", ".join(str(x.response_time) for x in payload_records)
+    _logger.info(f"{log_format} - stored {len(scoring_payload['input_data'][0]['values'])} records in {len(payload_records)} payload records with response times {response_times} ms for {model_name}.")
     _logger.info(f"{log_format} - store_payload completed for {model_name}.")
 
 
@@ -3,6 +3,8 @@ Watson Studio APIs.
 """
 import logging
 import requests
+from cpdflow.model import model as model_
+from cpdflow.wkc import wkc
 from cpdflow.wml import wml
 
 _logger = logging.getLogger(__name__)
@@ -29,6 +31,9 @@ def store_model(config: dict, model_config: dict, log_format: str) -> None:
     """
     Store model in project space.
 
+    The model is packaged once into a compressed artifact with ``model.package_model``, which is uploaded instead of the in-memory model.
+    Facts exported in the background by ``wkc.export_facts`` are waited for after the model is packaged, even if packaging fails.
+
     Args:
         config (dict): configuration dictionary
         model_config (dict): model configuraton
@@ -39,18 +44,23 @@ def store_model(config: dict, model_config: dict, log_format: str) -> None:
     project_id = config["project_id"]
     wml_client.set.default_project(project_id)
     model_name = model_config["model_name"]
-    model = model_config["model"]
+    try:
+        artifact_path = model_.package_model(config=config, model_config=model_config, log_format=log_format)
+        fingerprint = model_.get_fingerprint(config=config, model_config=model_config, log_format=log_format)
+    finally:
+        wkc.wait_for_facts(model_config=model_config, log_format=log_format)
     target = model_config["target"]
     input_data_schema = model_config["input_data_schema"]
     meta_props = {
         wml_client.repository.ModelMetaNames.NAME: model_name,
-        wml_client.repository.ModelMetaNames.TYPE: "scikit-learn_1.0",
-        wml_client.repository.ModelMetaNames.SOFTWARE_SPEC_UID: wml_client.software_specifications.get_uid_by_name("runtime-22.1-py3.9"),
+        wml_client.repository.ModelMetaNames.TYPE: model_config.get("model_type", model_.MODEL_TYPE),
+        wml_client.repository.ModelMetaNames.SOFTWARE_SPEC_UID: wml.get_software_spec_id(config=config, software_spec=model_config.get("software_spec", model_.SOFTWARE_SPEC)),
         wml_client.repository.ModelMetaNames.LABEL_FIELD: target,
         wml_client.repository.ModelMetaNames.INPUT_DATA_SCHEMA: input_data_schema,
+        wml_client.repository.ModelMetaNames.CUSTOM: {wml.FINGERPRINT_KEY: fingerprint},
     }
     facts_client.export_facts.prepare_model_meta(wml_client=wml_client, meta_props=meta_props)
-    wml_client.repository.store_model(model=model, meta_props=meta_props)
+    wml_client.repository.store_model(model=artifact_path, meta_props=meta_props)
     _logger.info(f"{log_format} - store_model completed for {model_name}.")
 
 
@@ -58,6 +68,8 @@ def update_model(config: dict, model_config: dict, log_format: str) -> None:
     """
     Update model.
 
+    The model is not updated if its fingerprint matches the fingerprint of the model in project space.
+
     Args:
         config (dict): configuration dictionary
         model_config (dict): model configuraton
@@ -68,11 +80,18 @@ def update_model(config: dict, model_config: dict, log_format: str) -> None:
     wml_client.set.default_project(project_id)
 
     model_name = model_config["model_name"]
-    model = model_config["model"]
+    try:
+        artifact_path = model_.package_model(config=config, model_config=model_config, log_format=log_format)
+        fingerprint = model_.get_fingerprint(config=config, model_config=model_config, log_format=log_format)
+    finally:
+        wkc.wait_for_facts(model_config=model_config, log_format=log_format)
+    if wml.get_model_fingerprints(config=config, space_type="project").get(model_name) == fingerprint:
+        _logger.info(f"{log_format} - update_model skipped, {model_name} is unchanged.")
+        return
     models = wml.get_models(config=config, space_type="project")
     model_uid = models[model_name]
-    updated_meta_props = {wml_client.repository.ModelMetaNames.NAME: model_name}
-    wml_client.repository.update_model(model_uid, updated_meta_props=updated_meta_props, update_model=model)
+    updated_meta_props = {wml_client.repository.ModelMetaNames.NAME: model_name, wml_client.repository.ModelMetaNames.CUSTOM: {wml.FINGERPRINT_KEY: fingerprint}}
+    wml_client.repository.update_model(model_uid, updated_meta_props=updated_meta_props, update_model=artifact_path)
     _logger.info(f"{log_format} - update_model completed for {model_name}.")
 
 
@@ -1,14 +1,32 @@
-def calculate_metrics(df):
-    from aif360.sklearn.metrics import disparate_impact_ratio, statistical_parity_difference
+import cpdflow_metrics as metrics
+
+PROTECTED_ATTRIBUTE = "Sex"
+PRIVILEGED_GROUP = "male"
+POSITIVE_LABEL = "Risk"
+PREDICTION = "_original_prediction"
+TARGET = "Risk"
+
 
-    dir = disparate_impact_ratio(df[["Sex", "_original_prediction"]].copy().set_index("Sex"), prot_attr=["Sex"], priv_group="male", pos_label="Risk")
+def accumulate(df, state):
+    counts = metrics.get_group_counts(
+        prot_attr=df[PROTECTED_ATTRIBUTE],
+        y_pred=df[PREDICTION],
+        priv_group=PRIVILEGED_GROUP,
+        pos_label=POSITIVE_LABEL,
+        y_true=df[TARGET] if TARGET in df.columns else None,
+    )
+    return metrics.merge_group_counts(state, counts)
 
-    spd = statistical_parity_difference(df[["Sex", "_original_prediction"]].copy().set_index("Sex"), prot_attr=["Sex"], priv_group="male", pos_label="Risk")
 
-    metrics = {
-        "statistical_parity_difference": spd, 
-        "disparate_impact_ratio": dir, 
+def finalize(state):
+    metrics_ = {
+        "statistical_parity_difference": metrics.statistical_parity_difference(state),
+        "disparate_impact_ratio": metrics.disparate_impact_ratio(state),
         "region": "us-south"
     }
 
-    return metrics
+    return {k: v for k, v in metrics_.items() if v is not None}
+
+
+def calculate_metrics(df):
+    return finalize(accumulate(df, {}))
@@ -1,12 +1,12 @@
 
-import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from cpdflow.data import read_csv
 from cpdflow.model.model import get_input_data_schema
 
-df = pd.read_csv("https://raw.githubusercontent.com/randyphoa/cpdflow/main/examples/german_credit_data_biased_training.csv")
+df = read_csv("https://raw.githubusercontent.com/randyphoa/cpdflow/main/examples/german_credit_data_biased_training.csv")
 target = "Risk"
 protected_attributes = ["Age"]
 y = df[target]